@@ -1,174 +1,164 @@
 import os
-import re
 import asyncio
-from typing import List, Dict, Any
-import httpx
-from chromadb import PersistentClient
+from typing import List, Dict, Any, AsyncIterator
+
+from chroma_writer import ChromaBatchWriter, has_summary
+from ingest_pipeline import run_pipeline, parsed_files, check_source_root
+from index_manifest import IndexManifest, assign_chunk_ids, MANIFEST_FILENAME
+from lexical_index import LEXICAL_INDEX_FILENAME
+from metrics import span, start_trace, stop_trace, print_span_summary
+from retrieval import rebuild_lexical_index, path_prefix_metadata, COLLECTION_NAME, SUMMARY_COLLECTION_NAME
+from shards import shard_path, write_shard_info, DEFAULT_SHARD
 
 # --- Configuration ---
-SWIFT_CODEBASE_ROOT = "./BP"
-LLM_API_URL = os.getenv("LLM_API_URL", "http://192.168.1.5:1234/v1/chat/completions")
+SWIFT_CODEBASE_ROOT = os.getenv("SWIFT_CODEBASE_ROOT", "./BP")
 MAX_FILE_SIZE = 15 * 1024  # 15 KB
-
-# --- Initialize ChromaDB ---
-client = PersistentClient(path="./chroma_data")
-collection = client.get_or_create_collection(name="swift_chunks")
-
-def add_to_chroma(doc: Dict[str, Any]):
-    safe_metadata = {
+CHROMA_ROOT = os.getenv("CHROMA_PATH", "./chroma_data")
+SHARD = os.getenv("SHARD", DEFAULT_SHARD)  # one shard per repo or module; "default" is CHROMA_ROOT itself
+CHROMA_PATH = shard_path(SHARD, CHROMA_ROOT)
+MANIFEST_PATH = os.path.join(CHROMA_PATH, MANIFEST_FILENAME)
+LEXICAL_INDEX_PATH = os.path.join(CHROMA_PATH, LEXICAL_INDEX_FILENAME)
+INDEX_MODE = os.getenv("INDEX_MODE", "incremental")  # "incremental" or "full"
+
+# --- ChromaDB (opened by open_index, not at import) ---
+# Parse workers started with spawn/forkserver re-import __main__, and must not each open
+# the database and load the embedding model
+client = None
+embedding_function = None
+collection = None
+summary_collection = None
+
+def open_index():
+    global client, embedding_function, collection, summary_collection
+    from chromadb import PersistentClient
+    from chromadb.utils import embedding_functions
+
+    client = PersistentClient(path=CHROMA_PATH)
+    # Loaded once and shared by every batch the writer embeds
+    embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    collection = client.get_or_create_collection(name=COLLECTION_NAME, embedding_function=embedding_function)
+    # LLM summaries, one per chunk under the chunk's id, so natural-language queries match prose
+    summary_collection = client.get_or_create_collection(name=SUMMARY_COLLECTION_NAME, embedding_function=embedding_function)
+
+def chunk_metadata(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "filepath": doc.get("filepath", ""),
         "start_line": doc.get("start_line", 0),
         "end_line": doc.get("end_line", 0),
         "type": doc.get("type") or "",
-        "name": doc.get("name") or ""
+        "name": doc.get("name") or "",
+        "parent": doc.get("parent") or "",
+        # dir_1..dir_N make path-prefix filters a plain `where` equality
+        **path_prefix_metadata(doc.get("filepath", ""))
     }
 
-    collection.add(
-        documents=[doc["content"]],
-        metadatas=[safe_metadata],
-        ids=[f"{doc['filepath']}:{doc['start_line']}:{doc['end_line']}"]
-    )
-
-# --- Swift Parser ---
-def parse_swift_file(filepath: str) -> List[Dict[str, Any]]:
-    chunks = []
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        declaration_pattern = re.compile(
-            r'^\s*(?:'
-            r'(?:public|internal|fileprivate|private|open)?\s*'
-            r'(?:final|static|class)?\s*'
-            r'(?:class|struct|enum|protocol)\s+[A-Za-z0-9_]+.*?\{.*?'
-            r'|'
-            r'(?:public|internal|fileprivate|private|open)?\s*'
-            r'(?:static|class)?\s*'
-            r'func\s+[A-Za-z0-9_]+\s*\(.*?\)\s*(?:->\s*[^\{]+)?\s*\{.*?'
-            r'|'
-            r'(?:public|internal|fileprivate|private|open)?\s*'
-            r'extension\s+[A-Za-z0-9_]+.*?\{.*?'
-            r')',
-            re.DOTALL | re.MULTILINE
-        )
-
-        matches = list(re.finditer(declaration_pattern, content))
-        last_end = 0
-
-        for match in matches:
-            start, end = match.span()
-            declaration_type = None
-            name = None
-
-            if any(kw in match.group(0) for kw in ['class', 'struct', 'enum', 'protocol']):
-                decl_match = re.search(r'(class|struct|enum|protocol)\s+([A-Za-z0-9_]+)', match.group(0))
-                if decl_match:
-                    declaration_type = decl_match.group(1)
-                    name = decl_match.group(2)
-            elif 'func' in match.group(0):
-                declaration_type = 'func'
-                name_match = re.search(r'func\s+([A-Za-z0-9_]+)', match.group(0))
-                if name_match:
-                    name = name_match.group(1)
-            elif 'extension' in match.group(0):
-                declaration_type = 'extension'
-                name_match = re.search(r'extension\s+([A-Za-z0-9_]+)', match.group(0))
-                if name_match:
-                    name = name_match.group(1)
-
-            if start > last_end:
-                raw_code = content[last_end:start].strip()
-                if raw_code:
-                    chunks.append({
-                        "content": raw_code,
-                        "filepath": filepath,
-                        "start_line": len(content[:last_end].splitlines()) + 1,
-                        "end_line": len(content[:start].splitlines()),
-                        "type": "raw_code",
-                        "name": None
-                    })
-
-            chunk_content = content[start:end].strip()
-            if chunk_content:
-                chunks.append({
-                    "content": chunk_content,
-                    "filepath": filepath,
-                    "start_line": len(content[:start].splitlines()) + 1,
-                    "end_line": len(content[:end].splitlines()),
-                    "type": declaration_type or "unknown_declaration",
-                    "name": name
-                })
-
-            last_end = end
-
-        if last_end < len(content):
-            raw_code = content[last_end:].strip()
-            if raw_code:
-                chunks.append({
-                    "content": raw_code,
-                    "filepath": filepath,
-                    "start_line": len(content[:last_end].splitlines()) + 1,
-                    "end_line": len(content.splitlines()),
-                    "type": "raw_code",
-                    "name": None
-                })
-
-        print(f"🔍 Found {len(chunks)} chunks in {filepath}")
-
-    except Exception as e:
-        print(f"Error parsing file {filepath}: {e}")
-
-    return chunks
-
-# --- LLM Summarizer ---
-async def generate_text_summary(code_chunk_content: str) -> str:
-    prompt = (
-        f"Analyze the following Swift code snippet and provide a concise, "
-        f"high-level summary of its purpose and functionality. "
-        f"Focus on what it does, not how it's implemented in detail. "
-        f"Keep the summary to 2–3 sentences.\n\n"
-        f"```swift\n{code_chunk_content}\n```\n\nSummary:"
-    )
-
-    payload = {
-        "model": "phi-3-mini-4k-instruct",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant that summarizes Swift code."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.3,
-        "max_tokens": 150
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(LLM_API_URL, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-    except Exception as e:
-        print(f"⚠️ Error calling LLM: {e}")
-        return "Error generating summary from LLM."
+def reset_collection():
+    global collection, summary_collection
+    for name in (COLLECTION_NAME, SUMMARY_COLLECTION_NAME):
+        try:
+            client.delete_collection(name=name)
+        except Exception:
+            pass  # not created yet
+    collection = client.get_or_create_collection(name=COLLECTION_NAME, embedding_function=embedding_function)
+    summary_collection = client.get_or_create_collection(name=SUMMARY_COLLECTION_NAME, embedding_function=embedding_function)
+
+async def delete_chunks(ids: List[str]):
+    for target in (collection, summary_collection):
+        await asyncio.to_thread(target.delete, ids=ids)
+
+# --- Incremental Planner ---
+async def changed_chunks(root_dir: str, manifest: IndexManifest) -> AsyncIterator[Dict[str, Any]]:
+    """Yield only chunks that need a summary; sync moved and deleted chunks in place."""
+    seen = set()
+    unreadable: List[str] = []
+    known_hashes = {path: entry["hash"] for path, entry in manifest.files.items()}
+    async for filepath, file_hash, chunks in parsed_files(root_dir, known_hashes, unreadable=unreadable):
+        seen.add(filepath)
+        if chunks is None:
+            continue  # unchanged, or unreadable this run: its entry and chunks stay as they are
+
+        entry = manifest.get(filepath)
+        assign_chunk_ids(chunks)
+        old_ids = set(entry["chunks"]) if entry else set()
+        # Chunks whose summary failed last time go through the LLM again
+        summarized_ids = old_ids - set(entry.get("unsummarized", [])) if entry else set()
+        new_chunks = [c for c in chunks if c["id"] not in summarized_ids]
+        kept_chunks = [c for c in chunks if c["id"] in summarized_ids]
+        stale_ids = old_ids - {c["id"] for c in chunks}
+
+        with span("sync", filepath=filepath, removed=len(stale_ids), reused=len(kept_chunks)):
+            if stale_ids:
+                await delete_chunks(list(stale_ids))
+            if kept_chunks:
+                # Unchanged text: keep summary and embedding, only refresh line ranges
+                for target in (collection, summary_collection):
+                    await asyncio.to_thread(
+                        target.update,
+                        ids=[c["id"] for c in kept_chunks],
+                        metadatas=[chunk_metadata(c) for c in kept_chunks]
+                    )
+        print(f"♻️ {filepath}: {len(new_chunks)} new, {len(kept_chunks)} reused, {len(stale_ids)} removed")
+        manifest.set(filepath, file_hash, [c["id"] for c in chunks])
+
+        for chunk in new_chunks:
+            yield chunk
+
+    # Files under a directory that couldn't be listed weren't seen, but aren't deleted either
+    skipped = tuple(os.path.join(directory, "") for directory in unreadable)
+    for filepath in [path for path in manifest.files if path not in seen and not path.startswith(skipped)]:
+        stale_ids = manifest.remove(filepath)
+        if stale_ids:
+            await delete_chunks(stale_ids)
+        print(f"🗑️ Removed deleted file: {filepath}")
 
 # --- Main Processor ---
 async def process_swift_codebase_and_generate_md(root_dir: str):
-    print(f"📂 Scanning Swift codebase in: {root_dir}")
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith(".swift"):
-                filepath = os.path.join(dirpath, filename)
-                print(f"🔄 Parsing: {filepath}")
-                chunks = parse_swift_file(filepath)
-
-                for chunk in chunks:
-                    print(f"💬 Generating summary for: {chunk['type']} {chunk['name']}")
-                    summary = await generate_text_summary(chunk["content"])
-                    print(f"🧠 Summary received for: {chunk['type']} {chunk['name']}")
-                    chunk["llm_summary"] = summary
-                    add_to_chroma(chunk)
+    print(f"📂 Scanning Swift codebase in: {root_dir} (shard: {SHARD})")
+    # Before anything is reset or pruned: a mistyped root must not empty the shard
+    check_source_root(root_dir)
+    if collection is None:
+        open_index()
+    manifest = IndexManifest(MANIFEST_PATH)
+    if INDEX_MODE == "full" or (manifest.is_empty and collection.count() > 0):
+        print(f"🧹 Full re-index: clearing {COLLECTION_NAME} and {SUMMARY_COLLECTION_NAME}")
+        reset_collection()
+        manifest.clear()
+
+    indexed_hashes = {path: entry["hash"] for path, entry in manifest.files.items()}
+    writer = ChromaBatchWriter(collection, embedding_function, chunk_metadata, summary_collection=summary_collection)
+    unsummarized: Dict[str, List[str]] = {}
+
+    def write(batch: List[Dict[str, Any]]):
+        for chunk in batch:
+            if not has_summary(chunk):
+                unsummarized.setdefault(chunk["filepath"], []).append(chunk["id"])
+        writer.add(batch)
+
+    try:
+        await run_pipeline(changed_chunks(root_dir, manifest), write)
+    finally:
+        # Flush whatever is buffered even if the run is interrupted
+        await asyncio.to_thread(writer.close)
+    for filepath, ids in unsummarized.items():
+        manifest.mark_unsummarized(filepath, ids)
+    if unsummarized:
+        print(f"🔁 {sum(map(len, unsummarized.values()))} chunks without a summary will be retried next run")
+    # BM25 postings are rebuilt from the collection whenever any file changed
+    changed = {path: entry["hash"] for path, entry in manifest.files.items()} != indexed_hashes
+    if changed or not os.path.exists(LEXICAL_INDEX_PATH):
+        with span("lexical_index"):
+            await asyncio.to_thread(rebuild_lexical_index, collection, CHROMA_PATH)
+    # Saved only after every new chunk is written, so a crash just redoes the work
+    manifest.save()
+    write_shard_info(CHROMA_PATH, SHARD, root_dir)
 
 # --- Entry Point ---
 if __name__ == "__main__":
     print("🚀 Starting Swift parser and summarizer with ChromaDB...")
-    asyncio.run(process_swift_codebase_and_generate_md(SWIFT_CODEBASE_ROOT))
+    start_trace()
+    try:
+        asyncio.run(process_swift_codebase_and_generate_md(SWIFT_CODEBASE_ROOT))
+    finally:
+        stop_trace()
+    print_span_summary()
     print("🏁 Finished processing.")
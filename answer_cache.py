@@ -0,0 +1,130 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import numpy as np
+
+# --- Configuration ---
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+# Cosine; 1.0 disables near-duplicates, since embeddings barely separate "how is X created" from "how is X deleted"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "1.0"))
+ANSWER_CACHE_VERSION_CHECK = float(os.getenv("ANSWER_CACHE_VERSION_CHECK", "5"))  # seconds between index checks
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!. ").lower()
+
+# --- Answer Cache ---
+class AnswerCache:
+    """LRU + TTL cache of generated answers, with near-duplicate lookup by query embedding.
+
+    `version_fn` returns a token that changes whenever the indexed collection
+    does; `check_version` drops the whole cache when it changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+        version_fn: Optional[Callable[[], Hashable]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.version_fn = version_fn
+        # key -> (answer, normalized embedding or None, created_at)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, Optional[np.ndarray], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self._matrix: Optional[np.ndarray] = None  # stacked embeddings, rebuilt lazily
+        self._matrix_keys: list = []
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def check_version(self):
+        """Drop every entry if the index changed. Calls `version_fn`, so keep it off the event loop."""
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._version = version
+                self._entries.clear()
+                self._matrix = None
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl
+
+    def get_exact(self, query: str, top_k: int) -> Optional[str]:
+        now = time.time()
+        key = (normalize_query(query), top_k)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[2], now):
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[0]
+
+    def get_similar(self, top_k: int, embedding: Any) -> Optional[str]:
+        """Call after a `get_exact` miss; counts the lookup as a miss if nothing is close enough."""
+        now = time.time()
+        with self._lock:
+            if self.similarity < 1.0 and self._entries:
+                if self._matrix is None:
+                    self._matrix_keys = [k for k, e in self._entries.items() if e[1] is not None]
+                    self._matrix = np.stack([self._entries[k][1] for k in self._matrix_keys]) \
+                        if self._matrix_keys else None
+                if self._matrix is not None:
+                    scores = self._matrix @ _unit(embedding)
+                    for index in np.argsort(-scores):
+                        if scores[index] < self.similarity:
+                            break
+                        key = self._matrix_keys[index]
+                        entry = self._entries.get(key)
+                        if key[1] == top_k and entry is not None and not self._expired(entry[2], now):
+                            self._entries.move_to_end(key)
+                            self.semantic_hits += 1
+                            return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, top_k: int, answer: str, embedding: Any = None):
+        key = (normalize_query(query), top_k)
+        vector = _unit(embedding) if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (answer, vector, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+def _unit(vector: Any) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
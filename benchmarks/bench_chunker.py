@@ -0,0 +1,83 @@
+"""Compare the single-pass chunker against the legacy regex parser.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_chunker [lines ...]
+"""
+import re
+import sys
+import time
+from typing import List, Dict, Any
+
+from swift_chunker import chunk_swift_source
+from benchmarks.synthetic_swift import generate_swift_source
+
+# --- Legacy regex parser (as shipped before swift_chunker) ---
+_LEGACY_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'(?:public|internal|fileprivate|private|open)?\s*'
+    r'(?:final|static|class)?\s*'
+    r'(?:class|struct|enum|protocol)\s+[A-Za-z0-9_]+.*?\{.*?'
+    r'|'
+    r'(?:public|internal|fileprivate|private|open)?\s*'
+    r'(?:static|class)?\s*'
+    r'func\s+[A-Za-z0-9_]+\s*\(.*?\)\s*(?:->\s*[^\{]+)?\s*\{.*?'
+    r'|'
+    r'(?:public|internal|fileprivate|private|open)?\s*'
+    r'extension\s+[A-Za-z0-9_]+.*?\{.*?'
+    r')',
+    re.DOTALL | re.MULTILINE
+)
+
+def legacy_chunks(content: str) -> List[Dict[str, Any]]:
+    chunks = []
+    last_end = 0
+    for match in _LEGACY_PATTERN.finditer(content):
+        start, end = match.span()
+        if start > last_end and content[last_end:start].strip():
+            chunks.append({"start_line": len(content[:last_end].splitlines()) + 1,
+                           "end_line": len(content[:start].splitlines())})
+        chunks.append({"start_line": len(content[:start].splitlines()) + 1,
+                       "end_line": len(content[:end].splitlines())})
+        last_end = end
+    return chunks
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def _treesitter_parser():
+    # Optional: only when tree_sitter is installed and build_languages.py has been run
+    try:
+        from swift_treesitter import TreeSitterSwiftParser
+        return TreeSitterSwiftParser()
+    except Exception as e:
+        print(f"(tree-sitter column skipped: {e})")
+        return None
+
+def main(sizes: List[int]):
+    ts_parser = _treesitter_parser()
+    print(f"{'lines':>8} {'bytes':>9} {'legacy ms':>10} {'chunker ms':>11} {'speedup':>8} {'chunks':>7}"
+          + (f" {'ts cold ms':>11} {'ts edit ms':>11}" if ts_parser else ""))
+    for lines in sizes:
+        source = generate_swift_source(lines, seed=lines)
+        legacy = _best_of(lambda: legacy_chunks(source), 1 if lines > 2000 else 3)
+        fast = _best_of(lambda: chunk_swift_source(source, "bench.swift"), 5)
+        count = len(chunk_swift_source(source, "bench.swift"))
+        row = (f"{lines:>8} {len(source):>9} {legacy * 1000:>10.1f} {fast * 1000:>11.2f} "
+               f"{legacy / fast:>7.0f}x {count:>7}")
+        if ts_parser:
+            encoded = source.encode("utf-8")
+            edited = encoded.replace(b"case primary", b"case primaryEdited", 1)
+            cold = _best_of(lambda: ts_parser.chunk(f"cold-{time.perf_counter()}", encoded), 3)
+            ts_parser.chunk("edit.swift", encoded)
+            edit = _best_of(lambda: (ts_parser.chunk("edit.swift", edited), ts_parser.chunk("edit.swift", encoded)), 3) / 2
+            row += f" {cold * 1000:>11.2f} {edit * 1000:>11.2f}"
+        print(row)
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 2000, 5000, 10000])
@@ -0,0 +1,122 @@
+"""Concurrent load test for the /ask endpoint.
+
+Against a running server:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000/ask -c 20 -n 200
+
+Or let it start a stub LLM and rag_server itself (uses ./chroma_data):
+
+    python -m benchmarks.load_test --spawn -c 20 -n 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator
+import httpx
+
+from benchmarks.timing import latency_summary
+
+DEFAULT_QUERIES = [
+    "How is the BootstrapCard initialized and rendered?",
+    "What does the LoginCard component do?",
+    "Where is the theme applied to buttons?",
+    "How are modal sheets presented?",
+]
+
+def wait_for_port(url: str, timeout: float = 60.0, require_ok: bool = False):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            response = httpx.get(url, timeout=1.0)
+            if not require_ok or response.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+@contextmanager
+def spawn_stub_llm(port: int, latency: float, tokens_per_second: float = None) -> Iterator[str]:
+    """Start the stub LLM as a subprocess; yields its chat completions URL."""
+    command = [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(port), "--latency", str(latency)]
+    if tokens_per_second:
+        command += ["--tokens-per-second", str(tokens_per_second)]
+    proc = subprocess.Popen(command)
+    try:
+        wait_for_port(f"http://127.0.0.1:{port}/docs")
+        yield f"http://127.0.0.1:{port}/v1/chat/completions"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+@contextmanager
+def spawn_services(server_port: int, stub_port: int, stub_latency: float, env: Dict[str, str] = None,
+                   stub_tps: float = None) -> Iterator[str]:
+    """Start the stub LLM and rag_server as subprocesses; yields the /ask URL."""
+    with spawn_stub_llm(stub_port, stub_latency, stub_tps) as llm_url:
+        child_env = dict(os.environ, **(env or {}))
+        child_env["LLM_API_URL"] = llm_url
+        proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "rag_server:app", "--port", str(server_port),
+                                 "--log-level", "warning"], env=child_env)
+        try:
+            # Warm, so the first measured requests don't pay for loading the embedding model
+            wait_for_port(f"http://127.0.0.1:{server_port}/ready", require_ok=True)
+            yield f"http://127.0.0.1:{server_port}/ask"
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+async def run_load(url: str, queries: List[str], concurrency: int, total: int, top_k: int = 5) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        async def user():
+            nonlocal next_index, errors
+            while next_index < total:
+                query = queries[next_index % len(queries)]
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json={"query": query, "top_k": top_k})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = latency_summary(latencies, elapsed)
+    result.update({"errors": errors, "concurrency": concurrency, "elapsed_s": elapsed})
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/ask")
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--spawn", action="store_true", help="start a stub LLM and rag_server")
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--server-port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.spawn:
+        with spawn_services(args.server_port, args.stub_port, args.stub_latency) as url:
+            result = asyncio.run(run_load(url, DEFAULT_QUERIES, args.concurrency, args.requests, args.top_k))
+    else:
+        result = asyncio.run(run_load(args.url, DEFAULT_QUERIES, args.concurrency, args.requests, args.top_k))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
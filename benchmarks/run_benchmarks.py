@@ -0,0 +1,218 @@
+"""End-to-end benchmark suite on a synthetic corpus with a local stub LLM.
+
+    python -m benchmarks.run_benchmarks --files 200 --lines 300 --stub-latency 0.2
+
+Measures parse throughput, ingestion docs/s (Parser_chroma.py), retrieval and
+lexical lookup latency, /ask p50/p99 and server startup (import, time to
+ready, first query), then writes everything to
+benchmarks/results/<timestamp>-<commit>.json and compares with the previous run.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+import httpx
+
+from benchmarks.synthetic_swift import generate_corpus
+from benchmarks.timing import latency_summary
+from benchmarks.load_test import DEFAULT_QUERIES, spawn_stub_llm, spawn_services, run_load
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")  # git-ignored; see --output-dir
+# Headline numbers compared against the previous run: (section, key, higher is better)
+HEADLINE = [
+    ("parse", "lines_per_s", True),
+    ("ingest", "docs_per_s", True),
+    ("retrieval", "p50_ms", False),
+    ("retrieval", "p99_ms", False),
+    ("lexical", "p50_ms", False),
+    ("ask", "p50_ms", False),
+    ("ask", "p99_ms", False),
+    ("startup", "import_ms", False),
+    ("startup", "ready_ms", False),
+    ("startup", "first_query_ms", False),
+]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# --- Stages ---
+def bench_parse(corpus: str, total_lines: int) -> Dict[str, Any]:
+    from ingest_pipeline import parsed_files, PARSE_WORKERS
+
+    async def parse_all():
+        files = chunks = 0
+        async for _, _, parsed in parsed_files(corpus):
+            files += 1
+            chunks += len(parsed or [])
+        return files, chunks
+
+    started = time.perf_counter()
+    files, chunks = asyncio.run(parse_all())
+    elapsed = time.perf_counter() - started
+    return {"files": files, "chunks": chunks, "seconds": elapsed, "workers": PARSE_WORKERS,
+            "files_per_s": files / elapsed, "lines_per_s": total_lines / elapsed, "chunks_per_s": chunks / elapsed}
+
+def bench_ingest(env: Dict[str, str], trace_path: str) -> Dict[str, Any]:
+    # With a reused --workdir, the trace would be appended to and every summary a cache hit
+    for path in [trace_path] + glob.glob(glob.escape(env["SUMMARY_CACHE_PATH"]) + "*"):
+        if os.path.exists(path):
+            os.remove(path)
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "Parser_chroma.py"], env=env, check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - started
+
+    stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    docs = 0
+    counters: Dict[str, float] = {}
+    with open(trace_path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if "counters" in event:
+                counters = event["counters"]  # written once, when the run ends
+                continue
+            stage = stages[event["span"]]
+            stage["count"] += 1
+            stage["seconds"] += event["duration_ms"] / 1000
+            if event["span"] == "write":
+                docs += event.get("docs", 0)
+    return {"docs": docs, "seconds": elapsed, "docs_per_s": docs / elapsed, "stages": dict(stages),
+            "counters": counters}
+
+def bench_retrieval(chroma_path: str, queries: int, top_k: int) -> Dict[str, Dict[str, Any]]:
+    from retrieval import ChunkIndex
+
+    index = ChunkIndex(chroma_path)
+    names = [m.get("name") for m in index.collection.get(limit=500, include=["metadatas"])["metadatas"]]
+    questions = DEFAULT_QUERIES + [f"Where is {name} used?" for name in names if name]
+    index.retrieve(questions[0], top_k)  # load the embedding model and the lexical index
+
+    latencies: List[float] = []
+    lexical_latencies: List[float] = []
+    lexical = index.lexical.get()
+    started = time.perf_counter()
+    for i in range(queries):
+        question = questions[i % len(questions)]
+        begin = time.perf_counter()
+        index.retrieve(question, top_k)
+        latencies.append(time.perf_counter() - begin)
+        if lexical is not None:
+            begin = time.perf_counter()
+            lexical.search(question, top_k)
+            lexical_latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+    return {
+        "retrieval": dict(latency_summary(latencies, elapsed), chunks=index.collection.count(), top_k=top_k),
+        "lexical": latency_summary(lexical_latencies, sum(lexical_latencies)),
+    }
+
+def bench_ask(env: Dict[str, str], args) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """/ask load test results, plus the server's own startup timings from /ready."""
+    with spawn_services(args.server_port, args.stub_port + 1, args.stub_latency, env, args.stub_tps) as url:
+        result = asyncio.run(run_load(url, DEFAULT_QUERIES, args.concurrency, args.requests, args.top_k))
+        startup = httpx.get(url.replace("/ask", "/ready"), timeout=5).json()
+    return result, {key: value for key, value in startup.items() if key.endswith("_ms")}
+
+# --- Reporting ---
+def previous_result(results_dir: str, exclude: str) -> Optional[Dict[str, Any]]:
+    if not os.path.isdir(results_dir):
+        return None
+    runs = sorted(name for name in os.listdir(results_dir) if name.endswith(".json") and name != exclude)
+    if not runs:
+        return None
+    with open(os.path.join(results_dir, runs[-1]), encoding="utf-8") as f:
+        return json.load(f)
+
+def print_comparison(result: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+    print(f"\n{'metric':<22}{'now':>12}{'previous':>12}{'change':>10}")
+    for section, key, higher_is_better in HEADLINE:
+        now = result.get(section, {}).get(key)
+        before = (previous or {}).get(section, {}).get(key)
+        if now is None:
+            continue
+        change = ""
+        if before:
+            delta = (now - before) / before * 100
+            better = delta > 0 if higher_is_better else delta < 0
+            change = f"{delta:+.1f}%{' ✅' if better else ''}"
+        before_text = f"{before:.2f}" if before is not None else "-"
+        print(f"{section + '.' + key:<22}{now:>12.2f}{before_text:>12}{change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=300, help="lines per synthetic file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stub-latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--stub-tps", type=float, default=100, help="stub tokens per second")
+    parser.add_argument("--retrieval-queries", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--server-port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=8766)
+    parser.add_argument("--skip-ask", action="store_true")
+    parser.add_argument("--workdir", help="keep corpus and index here instead of a temp dir")
+    parser.add_argument("--output-dir", default=RESULTS_DIR, help="where results are saved and compared")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag-bench-")
+    corpus = os.path.join(workdir, "corpus")
+    chroma_path = os.path.join(workdir, "chroma_data")
+    trace_path = os.path.join(workdir, "ingest_trace.jsonl")
+    # Retrieval modules read CHROMA_PATH at import; the server and ingestion run as subprocesses
+    os.environ["CHROMA_PATH"] = chroma_path
+
+    print(f"📝 Generating {args.files} files x {args.lines} lines in {corpus}")
+    generate_corpus(corpus, args.files, args.lines, args.seed)
+    result: Dict[str, Any] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "workdir"},
+    }
+
+    print("⏱️ Parsing")
+    result["parse"] = bench_parse(corpus, args.files * args.lines)
+
+    print("⏱️ Ingesting with the stub LLM")
+    with spawn_stub_llm(args.stub_port, args.stub_latency, args.stub_tps) as llm_url:
+        env = dict(os.environ, LLM_API_URL=llm_url, SWIFT_CODEBASE_ROOT=corpus, CHROMA_PATH=chroma_path,
+                   INDEX_MODE="full", INGEST_TRACE=trace_path,
+                   SUMMARY_CACHE_PATH=os.path.join(workdir, "summary_cache.sqlite"))
+        result["ingest"] = bench_ingest(env, trace_path)
+
+    print("⏱️ Retrieval")
+    result.update(bench_retrieval(chroma_path, args.retrieval_queries, args.top_k))
+
+    if not args.skip_ask:
+        print("⏱️ /ask load test")
+        # Answer cache off, so every request pays for retrieval and generation
+        result["ask"], result["startup"] = bench_ask(
+            dict(os.environ, CHROMA_PATH=chroma_path, ANSWER_CACHE_SIZE="0"), args
+        )
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = f"{result['timestamp'].replace(':', '').replace('+0000', 'Z')}-{result['commit']}.json"
+    path = os.path.join(args.output_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved {path}")
+    print_comparison(result, previous_result(args.output_dir, exclude=name))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Local OpenAI-compatible chat completions stub for benchmarks.
+
+    python -m benchmarks.stub_llm --port 1234 --latency 0.3 --tokens-per-second 80
+"""
+import argparse
+import asyncio
+import os
+import json
+import time
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+# --- Configuration ---
+STUB_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.2"))         # seconds before the first token
+STUB_TOKENS_PER_SECOND = float(os.getenv("STUB_LLM_TPS", "100"))
+STUB_COMPLETION_TOKENS = int(os.getenv("STUB_LLM_TOKENS", "40"))
+
+app = FastAPI(title="Stub LLM")
+
+def _completion_tokens(max_tokens: int) -> list:
+    count = min(STUB_COMPLETION_TOKENS, max_tokens or STUB_COMPLETION_TOKENS)
+    return [f"tok{i} " for i in range(count)]
+
+async def _stream(tokens: list, model: str):
+    await asyncio.sleep(STUB_LATENCY)
+    for token in tokens:
+        await asyncio.sleep(1 / STUB_TOKENS_PER_SECOND)
+        chunk = {"object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    tokens = _completion_tokens(body.get("max_tokens", 0))
+    if body.get("stream"):
+        return StreamingResponse(_stream(tokens, body.get("model", "stub")), media_type="text/event-stream")
+    await asyncio.sleep(STUB_LATENCY + len(tokens) / STUB_TOKENS_PER_SECOND)
+    return {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                     "finish_reason": "stop"}],
+        "usage": {"completion_tokens": len(tokens)},
+    }
+
+def main():
+    global STUB_LATENCY, STUB_TOKENS_PER_SECOND, STUB_COMPLETION_TOKENS
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=STUB_LATENCY)
+    parser.add_argument("--tokens-per-second", type=float, default=STUB_TOKENS_PER_SECOND)
+    parser.add_argument("--tokens", type=int, default=STUB_COMPLETION_TOKENS)
+    args = parser.parse_args()
+    STUB_LATENCY, STUB_TOKENS_PER_SECOND, STUB_COMPLETION_TOKENS = args.latency, args.tokens_per_second, args.tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
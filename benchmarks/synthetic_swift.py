@@ -0,0 +1,64 @@
+import os
+import random
+from typing import List
+
+# --- Synthetic Swift Corpus ---
+_WORDS = ["Card", "Button", "Login", "Sheet", "Theme", "Badge", "Modal", "Toast", "Grid", "Nav",
+          "Profile", "Session", "Cache", "Token", "Image", "Layout", "Alert", "Form", "Field", "Icon"]
+
+def _name(rng: random.Random, parts: int = 2) -> str:
+    return "".join(rng.choice(_WORDS) for _ in range(parts))
+
+def _method(rng: random.Random, indent: str) -> List[str]:
+    name = _name(rng)
+    name = name[0].lower() + name[1:]
+    return [
+        f"{indent}/// Handles {name}.",
+        f"{indent}func {name}(value: Int, label: String = \"{{}}\") -> String {{",
+        f"{indent}    // close brace in a comment }}",
+        f"{indent}    let items = (0..<value).map {{ \"\\(label)-\\($0)\" }}",
+        f"{indent}    if items.isEmpty {{",
+        f"{indent}        return \"empty {{\"",
+        f"{indent}    }}",
+        f"{indent}    return items.joined(separator: \", \")",
+        f"{indent}}}",
+        "",
+    ]
+
+def generate_swift_source(target_lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["import UIKit", "import SwiftUI", ""]
+    while len(lines) < target_lines:
+        kind = rng.choice(["class", "struct", "enum", "extension", "func"])
+        name = _name(rng)
+        if kind == "func":
+            lines.extend(_method(rng, ""))
+            continue
+        header = {
+            "class": f"public final class {name}: UIView {{",
+            "struct": f"struct {name}: Equatable {{",
+            "enum": f"enum {name} {{",
+            "extension": f"extension {name}: CustomStringConvertible {{",
+        }[kind]
+        lines.extend(["@available(iOS 15.0, *)", header])
+        if kind == "enum":
+            lines.append("    case primary, secondary")
+        lines.append(f"    private let title = \"\"\"\n    {name} }} {{\n    \"\"\"")
+        lines.append("    /* nested /* block */ comment { */")
+        for _ in range(rng.randint(2, 8)):
+            lines.extend(_method(rng, "    "))
+        if kind == "class":
+            lines.append(f"    struct Nested{name} {{ let id = 0 }}")
+        lines.extend(["}", ""])
+    return "\n".join(lines) + "\n"
+
+def generate_corpus(root: str, num_files: int, lines_per_file: int, seed: int = 0) -> List[str]:
+    paths = []
+    for i in range(num_files):
+        directory = os.path.join(root, f"Module{i % 8}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"File{i}.swift")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_swift_source(lines_per_file, seed + i))
+        paths.append(path)
+    return paths
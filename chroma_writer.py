@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+from typing import List, Dict, Any, Callable
+
+from summarizer import SUMMARY_ERROR
+from metrics import record_span
+
+# --- Configuration ---
+CHROMA_WRITE_BATCH = int(os.getenv("CHROMA_WRITE_BATCH", "256"))
+
+# --- Buffered Writer ---
+class ChromaBatchWriter:
+    """Buffers chunks and upserts them in batches with embeddings computed up front.
+
+    One embedding model instance embeds a whole batch in a single vectorized call,
+    and each flush is one `upsert`, instead of one embed + add per document.
+    With `summary_collection`, each chunk's LLM summary is embedded in the same
+    call and upserted there under the chunk's id.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding_function: Callable[[List[str]], Any],
+        metadata_fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+        batch_size: int = CHROMA_WRITE_BATCH,
+        summary_collection=None,
+    ):
+        self.collection = collection
+        self.summary_collection = summary_collection
+        self.embedding_function = embedding_function
+        self.metadata_fn = metadata_fn
+        self.batch_size = batch_size
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.docs_written = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def add(self, docs: List[Dict[str, Any]]):
+        with self._lock:
+            self._buffer.extend(docs)
+            while len(self._buffer) >= self.batch_size:
+                batch = self._buffer[:self.batch_size]
+                self._buffer = self._buffer[self.batch_size:]
+                self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        documents = [doc["content"] for doc in batch]
+        summarized = [doc for doc in batch if has_summary(doc)] if self.summary_collection is not None else []
+        summaries = [doc["llm_summary"] for doc in summarized]
+        started = time.perf_counter()
+        embeddings = self.embedding_function(documents + summaries)
+        embedded = time.perf_counter()
+        # upsert: an interrupted run may already have written some of these ids
+        self.collection.upsert(
+            ids=[doc["id"] for doc in batch],
+            embeddings=embeddings[:len(documents)],
+            documents=documents,
+            metadatas=[self.metadata_fn(doc) for doc in batch]
+        )
+        if summarized:
+            self.summary_collection.upsert(
+                ids=[doc["id"] for doc in summarized],
+                embeddings=embeddings[len(documents):],
+                documents=summaries,
+                metadatas=[self.metadata_fn(doc) for doc in summarized]
+            )
+        written = time.perf_counter()
+        record_span("embed", embedded - started, docs=len(documents) + len(summaries))
+        record_span("write", written - embedded, docs=len(batch))
+        self.embed_seconds += embedded - started
+        self.write_seconds += written - embedded
+        self.docs_written += len(batch)
+
+    def close(self):
+        self.flush()
+        elapsed = time.perf_counter() - self.started
+        rate = self.docs_written / elapsed if elapsed > 0 else 0.0
+        print(f"💾 Wrote {self.docs_written} docs ({rate:.1f} docs/s overall; "
+              f"embed {self.embed_seconds:.1f}s, write {self.write_seconds:.1f}s)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def has_summary(doc: Dict[str, Any]) -> bool:
+    summary = doc.get("llm_summary")
+    return bool(summary) and summary != SUMMARY_ERROR
@@ -0,0 +1,109 @@
+import os
+import re
+from typing import List, Dict, Any, Optional, Set
+
+from lexical_index import tokenize
+
+# --- Configuration ---
+# phi-3-mini has a 4k window: context budget + prompt template + question + max_tokens must fit
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2800"))
+CONTEXT_MAX_CHUNK_TOKENS = int(os.getenv("CONTEXT_MAX_CHUNK_TOKENS", "900"))  # one chunk's share
+CONTEXT_MIN_CHUNK_TOKENS = 48  # smaller leftovers are not worth a trimmed snippet
+ELISION = "// ..."
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+# --- Token estimate ---
+def estimate_tokens(text: str) -> int:
+    """Fast BPE-ish estimate: one token per punctuation mark, ~4 characters per word piece."""
+    return sum((len(piece) + 3) // 4 for piece in _PIECE_RE.findall(text))
+
+# --- Trimming ---
+def _header(hit: Dict[str, Any]) -> str:
+    metadata = hit["metadata"]
+    return f"[{metadata.get('type', '')} {metadata.get('name', '')}]"
+
+def _join_spans(lines: List[str], keep: List[bool]) -> str:
+    """Kept lines in order, with an elision marker wherever lines were dropped."""
+    out: List[str] = []
+    for line, kept in zip(lines, keep):
+        if kept:
+            out.append(line)
+        elif not out or out[-1] != ELISION:
+            out.append(ELISION)
+    return "\n".join(out)
+
+def trim_to_budget(lines: List[str], keep: List[bool], query_terms: Set[str], budget: int) -> List[bool]:
+    """Narrow `keep` to the declaration line plus the window of lines that best matches the query."""
+    costs = [estimate_tokens(line) + 1 if kept else 0 for line, kept in zip(lines, keep)]
+    first = next((i for i, kept in enumerate(keep) if kept), None)
+    if first is None:
+        return keep
+    relevance = [len(query_terms.intersection(tokenize(line))) if kept else 0 for line, kept in zip(lines, keep)]
+    budget -= costs[first] + 2 * (estimate_tokens(ELISION) + 1)  # declaration line and elision markers
+
+    # Sliding window maximizing query-term hits within the remaining budget; the earliest
+    # window wins ties, so without query matches the chunk keeps its opening lines
+    best_score, best_start, best_end = -1, first + 1, first + 1
+    start, cost, score = first + 1, 0, 0
+    for end in range(first + 1, len(lines)):
+        cost += costs[end]
+        score += relevance[end]
+        while cost > budget and start <= end:
+            cost -= costs[start]
+            score -= relevance[start]
+            start += 1
+        if score > best_score or (score == best_score and start == best_start):
+            best_score, best_start, best_end = score, start, end + 1
+    trimmed = [False] * len(lines)
+    trimmed[first] = True
+    for i in range(best_start, best_end):
+        trimmed[i] = keep[i]
+    return trimmed
+
+# --- Packer ---
+def pack_context(query: str, hits: List[Dict[str, Any]], budget: Optional[int] = None) -> List[str]:
+    """Fill `budget` tokens with hits in relevance order.
+
+    Lines already included from the same file are elided, duplicates are dropped,
+    and chunks larger than their share are trimmed to the span that best matches
+    the query.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    query_terms = set(tokenize(query))
+    covered: Dict[str, Set[int]] = {}
+    seen_text: Set[str] = set()
+    contexts: List[str] = []
+    remaining = budget
+
+    for hit in hits:
+        document = hit["document"] or ""
+        metadata = hit["metadata"]
+        if document in seen_text:
+            continue
+        filepath = metadata.get("filepath", "")
+        start_line = int(metadata.get("start_line") or 0)
+        end_line = int(metadata.get("end_line") or 0)
+        lines = document.splitlines()
+        line_numbers: List[Optional[int]] = [start_line + i for i in range(len(lines))] \
+            if start_line and end_line - start_line + 1 == len(lines) else [None] * len(lines)
+
+        # Drop lines another selected chunk from this file already shows
+        file_covered = covered.setdefault(filepath, set())
+        keep = [number is None or number not in file_covered for number in line_numbers]
+        if not any(keep) or not any(line.strip() for line, kept in zip(lines, keep) if kept):
+            continue
+
+        header = _header(hit)
+        limit = min(CONTEXT_MAX_CHUNK_TOKENS, remaining) - estimate_tokens(header) - 1
+        if limit < CONTEXT_MIN_CHUNK_TOKENS:
+            break
+        if sum(estimate_tokens(line) + 1 for line, kept in zip(lines, keep) if kept) > limit:
+            keep = trim_to_budget(lines, keep, query_terms, limit)
+
+        text = f"{header}\n{_join_spans(lines, keep)}"
+        contexts.append(text)
+        remaining -= estimate_tokens(text)
+        seen_text.add(document)
+        file_covered.update(number for number, kept in zip(line_numbers, keep) if kept and number is not None)
+    return contexts
@@ -0,0 +1,88 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional
+
+# Bump whenever the stored chunk metadata/id scheme changes so old indexes are rebuilt
+MANIFEST_VERSION = 3  # 2: summaries indexed in swift_summaries, 3: dir_N path metadata
+MANIFEST_FILENAME = "index_manifest.json"
+
+# --- Hashing ---
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text: str) -> str:
+    return hash_bytes(text.encode("utf-8"))
+
+def assign_chunk_ids(chunks: List[Dict[str, Any]]):
+    # Ids depend on file and chunk text only, so a chunk keeps its id when lines shift
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        digest = hash_text(chunk["content"])[:16]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        chunk["chunk_hash"] = digest
+        chunk["id"] = f"{chunk['filepath']}:{digest}" + (f":{occurrence}" if occurrence else "")
+
+def write_json_atomic(path: str, data: Any):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+# --- Manifest ---
+class IndexManifest:
+    """Per-file content hash and chunk ids of everything currently in the index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+        else:
+            print("♻️ Manifest version changed, full re-index required")
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.files
+
+    def get(self, filepath: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(filepath)
+
+    def set(self, filepath: str, file_hash: str, chunk_ids: List[str]):
+        self.files[filepath] = {"hash": file_hash, "chunks": chunk_ids}
+
+    def mark_unsummarized(self, filepath: str, chunk_ids: List[str]):
+        """Chunks indexed without a summary: the file is parsed again next run and they are re-summarized."""
+        entry = self.files.get(filepath)
+        if entry is not None:
+            entry["hash"] = None
+            entry["unsummarized"] = sorted(set(entry.get("unsummarized", [])) | set(chunk_ids))
+
+    def remove(self, filepath: str) -> List[str]:
+        entry = self.files.pop(filepath, None)
+        return entry["chunks"] if entry else []
+
+    def clear(self):
+        self.files = {}
+
+    def save(self):
+        write_json_atomic(self.path, {"version": MANIFEST_VERSION, "files": self.files})
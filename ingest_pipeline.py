@@ -0,0 +1,246 @@
+import os
+import asyncio
+import time
+import fnmatch
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+import httpx
+
+from summarizer import generate_text_summary, create_llm_client, SUMMARY_CONCURRENCY
+from summary_cache import get_summary_cache
+from swift_chunker import parse_swift_source
+from index_manifest import hash_bytes
+from metrics import span, record_span, CHUNKS_PROCESSED
+
+# --- Configuration ---
+SINK_BATCH_SIZE = int(os.getenv("SINK_BATCH_SIZE", "32"))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARSE_BATCH_FILES = int(os.getenv("PARSE_BATCH_FILES", "16"))
+# Explicit, so behaviour doesn't depend on the platform default (spawn on macOS, forkserver on
+# Linux from Python 3.14); forking a process that already runs threads is unsafe
+PARSE_START_METHOD = os.getenv("PARSE_START_METHOD", "spawn")
+DEFAULT_IGNORE_PATTERNS = ["Pods", "DerivedData", ".build", "Carthage", ".git", ".swiftpm", "*.xcassets"]
+IGNORE_PATTERNS = DEFAULT_IGNORE_PATTERNS + [
+    p.strip() for p in os.getenv("INGEST_IGNORE", "").split(",") if p.strip()
+]
+
+Chunk = Dict[str, Any]
+# (filepath, content hash, chunks); chunks is None when the hash matched the known one, and
+# the hash is None too when the file couldn't be read or parsed (keep what was indexed, retry later)
+ParsedFile = Tuple[str, Optional[str], Optional[List[Chunk]]]
+
+_DONE = object()
+
+# --- File discovery ---
+def _is_ignored(name: str, relpath: str, patterns: List[str]) -> bool:
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relpath, p) for p in patterns)
+
+def check_source_root(root_dir: str):
+    """Raise unless `root_dir` can be walked; to the manifest, an empty walk looks like every file was deleted."""
+    if not os.path.isdir(root_dir):
+        raise NotADirectoryError(f"Swift codebase root is not a directory: {root_dir}")
+    with os.scandir(root_dir):
+        pass  # PermissionError if it can't be listed
+
+def walk_swift_files(
+    root_dir: str,
+    ignore_patterns: List[str] = IGNORE_PATTERNS,
+    unreadable: Optional[List[str]] = None,
+) -> Iterator[str]:
+    """Every non-ignored .swift file under `root_dir`; directories that can't be listed go to `unreadable`."""
+    check_source_root(root_dir)
+    # scandir reuses the directory entry's cached type, avoiding a stat per file
+    stack = [root_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"⚠️ Cannot read {directory}: {e}")
+            if unreadable is not None:
+                unreadable.append(directory)
+            continue
+        for entry in entries:
+            relpath = os.path.relpath(entry.path, root_dir)
+            if entry.is_dir(follow_symlinks=False):
+                if not _is_ignored(entry.name, relpath, ignore_patterns):
+                    stack.append(entry.path)
+            elif entry.name.endswith(".swift") and not _is_ignored(entry.name, relpath, ignore_patterns):
+                yield entry.path
+
+# --- Parallel parsing ---
+def parse_file_batch(batch: List[Tuple[str, Optional[str]]]) -> List[ParsedFile]:
+    """Runs in a worker process: hash each file and parse it unless the hash is already known."""
+    results = []
+    for filepath, known_hash in batch:
+        try:
+            with open(filepath, "rb") as f:
+                source = f.read()
+        except OSError as e:
+            print(f"Error reading file {filepath}: {e}")
+            results.append((filepath, None, None))
+            continue
+        file_hash = hash_bytes(source)
+        if file_hash == known_hash:
+            results.append((filepath, file_hash, None))
+            continue
+        try:
+            chunks = parse_swift_source(source, filepath)
+            print(f"🔍 Found {len(chunks)} chunks in {filepath}")
+        except Exception as e:
+            # No hash recorded, so the file is parsed again on the next run
+            print(f"Error parsing file {filepath}: {e}")
+            results.append((filepath, None, None))
+            continue
+        results.append((filepath, file_hash, chunks))
+    return results
+
+def _timed_parse_batch(batch: List[Tuple[str, Optional[str]]]) -> Tuple[List[ParsedFile], float, float]:
+    # Timed in the worker so the span excludes time spent queued in the pool
+    started = time.time()
+    begin = time.perf_counter()
+    results = parse_file_batch(batch)
+    return results, time.perf_counter() - begin, started
+
+def _record_parse(results: List[ParsedFile], seconds: float, started: float):
+    parsed = [chunks for _, _, chunks in results if chunks is not None]
+    record_span("parse", seconds, started, files=len(results), parsed=len(parsed),
+                chunks=sum(len(chunks) for chunks in parsed))
+
+def _batches(filepaths: Iterator[str], known_hashes: Dict[str, str]) -> Iterator[List[Tuple[str, Optional[str]]]]:
+    batch = []
+    for filepath in filepaths:
+        batch.append((filepath, known_hashes.get(filepath)))
+        if len(batch) >= PARSE_BATCH_FILES:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def parsed_files(
+    root_dir: str,
+    known_hashes: Optional[Dict[str, str]] = None,
+    workers: int = PARSE_WORKERS,
+    unreadable: Optional[List[str]] = None,
+) -> AsyncIterator[ParsedFile]:
+    """Discover and parse files in a process pool, yielding each file as its batch completes.
+
+    At most two batches per worker are in flight, so discovery and parsing stay
+    ahead of the summarizers without holding the whole tree's chunks in memory.
+    Directories that couldn't be listed are appended to `unreadable`.
+    """
+    known_hashes = known_hashes or {}
+    batches = _batches(walk_swift_files(root_dir, unreadable=unreadable), known_hashes)
+    loop = asyncio.get_running_loop()
+
+    if workers <= 1:
+        for batch in batches:
+            results, seconds, started = await asyncio.to_thread(_timed_parse_batch, batch)
+            _record_parse(results, seconds, started)
+            for result in results:
+                yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PARSE_START_METHOD)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                else:
+                    pending.add(loop.run_in_executor(pool, _timed_parse_batch, batch))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                results, seconds, started = future.result()
+                _record_parse(results, seconds, started)
+                for result in results:
+                    yield result
+
+# --- Pipeline ---
+async def run_pipeline(
+    chunks: AsyncIterator[Chunk],
+    sink: Callable[[List[Chunk]], None],
+    concurrency: int = SUMMARY_CONCURRENCY,
+    batch_size: int = SINK_BATCH_SIZE,
+) -> int:
+    """Summarize chunks with a bounded worker pool and hand them to `sink` in batches.
+
+    The producer drains `chunks` into a bounded queue, `concurrency` workers call the
+    LLM through one pooled client, and a single sink task batches the results. `sink`
+    is synchronous and runs in a thread. Returns the number of chunks processed.
+    """
+    work_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 4)
+    done_queue: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 2)
+    started = time.perf_counter()
+
+    async def producer():
+        try:
+            async for chunk in chunks:
+                await work_queue.put(chunk)
+        finally:
+            for _ in range(concurrency):
+                await work_queue.put(_DONE)
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            chunk = await work_queue.get()
+            if chunk is _DONE:
+                return
+            print(f"💬 Generating summary for: {chunk['type']} {chunk['name']}")
+            with span("summarize", chunk=chunk["name"] or "", filepath=chunk.get("filepath", "")):
+                chunk["llm_summary"] = await generate_text_summary(chunk["content"], client)
+            print(f"🧠 Summary received for: {chunk['type']} {chunk['name']}")
+            await done_queue.put(chunk)
+
+    async def batcher() -> int:
+        total = 0
+        batch: List[Chunk] = []
+        while True:
+            chunk = await done_queue.get()
+            if chunk is not _DONE:
+                batch.append(chunk)
+            if batch and (chunk is _DONE or len(batch) >= batch_size):
+                with span("sink", chunks=len(batch)):
+                    await asyncio.to_thread(sink, batch)
+                total += len(batch)
+                CHUNKS_PROCESSED.inc(len(batch))
+                batch = []
+            if chunk is _DONE:
+                return total
+
+    async with create_llm_client(concurrency) as client:
+        sink_task = asyncio.create_task(batcher())
+        producer_task = asyncio.create_task(producer())
+        workers = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+
+        async def upstream():
+            await asyncio.gather(producer_task, *workers)
+            await done_queue.put(_DONE)
+
+        upstream_task = asyncio.create_task(upstream())
+        try:
+            # The sink is supervised with the workers: if it died, they would block on a full done_queue
+            done, _ = await asyncio.wait({upstream_task, sink_task}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            total = sink_task.result()
+        except BaseException:
+            for task in (upstream_task, producer_task, sink_task, *workers):
+                task.cancel()
+            raise
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"📊 Processed {total} chunks in {elapsed:.1f}s ({rate:.2f} chunks/s, concurrency={concurrency})")
+    cache = get_summary_cache()
+    if cache:
+        stats = cache.stats()
+        print(f"🗄️ Summary cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['entries']} entries")
+    return total
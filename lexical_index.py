@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import mmap
+import math
+import struct
+import tempfile
+from collections import Counter
+from typing import List, Dict, Iterable, Tuple, Optional
+import numpy as np
+
+# --- Configuration ---
+LEXICAL_INDEX_FILENAME = "lexical.idx"
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Terms in more than this fraction of chunks add ~0 to BM25 but cost a full postings
+# scan; they are skipped whenever the query has a rarer term
+LEXICAL_MAX_DF_FRACTION = float(os.getenv("LEXICAL_MAX_DF_FRACTION", "0.05"))
+
+_MAGIC = b"BM25IDX1"
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Splits camelCase, PascalCase, acronyms and digits: "presentHTTPLogin2Sheet" -> present HTTP Login 2 Sheet
+_SUBWORD_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_STOPWORDS = {
+    "let", "var", "func", "return", "self", "if", "else", "guard", "in", "for", "the", "is", "of",
+    "to", "and", "a", "an", "import", "case", "where", "how", "what", "does", "do", "with",
+}
+
+# --- Tokenizer ---
+def tokenize(text: str) -> List[str]:
+    """Identifier-aware tokens: each whole identifier plus its camelCase/snake_case parts, lowercased."""
+    tokens = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        lowered = identifier.lower()
+        if lowered in _STOPWORDS:
+            continue
+        tokens.append(lowered)
+        parts = [p.lower() for piece in identifier.split("_") for p in _SUBWORD_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) > 1 and p not in _STOPWORDS)
+    return tokens
+
+# --- Builder ---
+def build_lexical_index(docs: Iterable[Tuple[str, str]], path: str) -> int:
+    """Write a BM25 index for (doc_id, text) pairs to `path` atomically; returns the doc count.
+
+    Layout: magic, header length, JSON header (doc ids, term -> [offset, df]),
+    then float32 per-doc length norms, uint32 posting doc indices and uint16
+    term frequencies, each postings list contiguous per term.
+    """
+    doc_ids: List[str] = []
+    lengths: List[int] = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc_id, text in docs:
+        counts = Counter(tokenize(text))
+        index = len(doc_ids)
+        doc_ids.append(doc_id)
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((index, min(tf, 65535)))
+
+    n_docs = len(doc_ids)
+    avgdl = (sum(lengths) / n_docs) if n_docs else 1.0
+    norms = np.array(
+        [BM25_K1 * (1 - BM25_B + BM25_B * length / max(avgdl, 1e-9)) for length in lengths], dtype=np.float32
+    )
+
+    terms: Dict[str, List[int]] = {}
+    posting_docs: List[int] = []
+    posting_tfs: List[int] = []
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [len(posting_docs), len(entries)]
+        posting_docs.extend(doc for doc, _ in entries)
+        posting_tfs.extend(tf for _, tf in entries)
+
+    header = json.dumps({"n_docs": n_docs, "avgdl": avgdl, "doc_ids": doc_ids, "terms": terms},
+                        separators=(",", ":")).encode("utf-8")
+    body = [
+        norms.tobytes(),
+        np.array(posting_docs, dtype=np.uint32).tobytes(),
+        np.array(posting_tfs, dtype=np.uint16).tobytes(),
+    ]
+    prefix_len = len(_MAGIC) + 8 + len(header)
+    padding = b"\0" * (-prefix_len % 8)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".idx")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(padding)
+            for section in body:
+                f.write(section)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return n_docs
+
+# --- Reader ---
+class LexicalIndex:
+    """Memory-mapped BM25 index; postings are scored with numpy straight from the map."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a lexical index")
+        header_len = struct.unpack_from("<Q", self._mm, len(_MAGIC))[0]
+        header_start = len(_MAGIC) + 8
+        header = json.loads(self._mm[header_start:header_start + header_len])
+        self.n_docs: int = header["n_docs"]
+        self.doc_ids: List[str] = header["doc_ids"]
+        self.terms: Dict[str, List[int]] = header["terms"]
+        total_postings = sum(count for _, count in self.terms.values())
+
+        offset = header_start + header_len
+        offset += -offset % 8
+        self._norms = np.frombuffer(self._mm, dtype=np.float32, count=self.n_docs, offset=offset)
+        offset += 4 * self.n_docs
+        self._docs = np.frombuffer(self._mm, dtype=np.uint32, count=total_postings, offset=offset)
+        offset += 4 * total_postings
+        self._tfs = np.frombuffer(self._mm, dtype=np.uint16, count=total_postings, offset=offset)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        entries = sorted((self.terms[t] for t in set(tokenize(query)) if t in self.terms), key=lambda e: e[1])
+        if not entries:
+            return []
+        max_df = max(self.n_docs * LEXICAL_MAX_DF_FRACTION, entries[0][1])
+        doc_chunks = []
+        score_chunks = []
+        for start, df in entries:
+            if df > max_df:
+                break
+            docs = self._docs[start:start + df]
+            tfs = self._tfs[start:start + df].astype(np.float32)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            doc_chunks.append(docs)
+            score_chunks.append(idf * tfs * (BM25_K1 + 1) / (tfs + self._norms[docs]))
+
+        if len(doc_chunks) == 1:
+            docs, scores = doc_chunks[0], score_chunks[0]
+        else:
+            docs, inverse = np.unique(np.concatenate(doc_chunks), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_chunks))
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[docs[i]], float(scores[i])) for i in top]
+
+    def close(self):
+        self._norms = self._docs = self._tfs = None
+        self._mm.close()
+
+class LexicalIndexHandle:
+    """Opens the index lazily and re-opens it when ingestion replaces the file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Optional[LexicalIndex] = None
+        self._mtime: Optional[int] = None
+
+    def get(self) -> Optional[LexicalIndex]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            try:
+                self._index = LexicalIndex(self.path)
+                self._mtime = mtime
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not open lexical index {self.path}: {e}")
+                return None
+        return self._index
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        index = self.get()
+        return index.search(query, k) if index else []
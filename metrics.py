@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, TextIO
+
+# --- Configuration ---
+INGEST_TRACE = os.getenv("INGEST_TRACE", "")  # JSON-lines span trace for ingestion runs
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+# --- Metric types ---
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def values(self) -> Dict[str, float]:
+        with self._lock:
+            return {f"{self.name}{_format_labels(key)}": value for key, value in sorted(self._values.items())}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines += [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # label key -> (per-bucket counts + overflow, sum, count)
+        self._series: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def summary(self) -> Dict[LabelKey, Tuple[float, int]]:
+        with self._lock:
+            return {key: (series[1], series[2]) for key, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+# --- Registry ---
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def counter_values(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for metric in self._metrics.values():
+            if isinstance(metric, Counter):
+                values.update(metric.values())
+        return values
+
+REGISTRY = Registry()  # served by the RAG server's /metrics
+INGEST_REGISTRY = Registry()  # ingestion runs only; reported at the end of the run and in the trace
+
+SPAN_SECONDS = REGISTRY.histogram("rag_span_seconds", "Duration of pipeline stages by span name")
+CHUNKS_PROCESSED = INGEST_REGISTRY.counter("rag_chunks_processed_total", "Chunks summarized and handed to the writer")
+SUMMARY_CACHE_LOOKUPS = INGEST_REGISTRY.counter("rag_summary_cache_lookups_total", "Summary cache lookups by result")
+SUMMARY_ERRORS = INGEST_REGISTRY.counter("rag_summary_errors_total", "Chunks whose LLM summary failed")
+ANSWER_CACHE_LOOKUPS = REGISTRY.counter("rag_answer_cache_lookups_total", "Answer cache lookups by result")
+LLM_ERRORS = REGISTRY.counter("rag_llm_errors_total", "Failed LLM calls by stage")
+REQUEST_SECONDS = REGISTRY.histogram("rag_request_seconds", "HTTP request latency by path (until headers are sent)")
+TTFT_SECONDS = REGISTRY.histogram("rag_ttft_seconds", "Time to first streamed token")
+
+# --- Spans + JSONL trace ---
+_trace_file: Optional[TextIO] = None
+_trace_lock = threading.Lock()
+
+def start_trace(path: str = INGEST_TRACE):
+    """Append one JSON line per span to `path` until `stop_trace`."""
+    global _trace_file
+    if path:
+        _trace_file = open(path, "a", encoding="utf-8", buffering=1)
+        print(f"🧾 Tracing spans to {path}")
+
+def stop_trace():
+    """Write the run's ingestion counters as a final line and close the trace."""
+    global _trace_file
+    with _trace_lock:
+        if _trace_file is not None:
+            _trace_file.write(json.dumps({"counters": INGEST_REGISTRY.counter_values(), "time": time.time()}) + "\n")
+            _trace_file.close()
+            _trace_file = None
+
+def record_span(name: str, seconds: float, started: Optional[float] = None, /, **attrs):
+    """Record a duration measured elsewhere (e.g. in a worker process)."""
+    SPAN_SECONDS.observe(seconds, span=name)
+    if _trace_file is not None:
+        event = {"span": name, "start": started if started is not None else time.time() - seconds,
+                 "duration_ms": round(seconds * 1000, 3), "thread": threading.current_thread().name, **attrs}
+        with _trace_lock:
+            if _trace_file is not None:
+                _trace_file.write(json.dumps(event) + "\n")
+
+@contextmanager
+def span(name: str, /, **attrs):
+    started = time.time()
+    begin = time.perf_counter()
+    try:
+        yield attrs  # callers may add attributes before the span closes
+    finally:
+        record_span(name, time.perf_counter() - begin, started, **attrs)
+
+def print_span_summary():
+    summary = SPAN_SECONDS.summary()
+    for key, (total, count) in sorted(summary.items(), key=lambda item: -item[1][0]):
+        name = dict(key).get("span", "")
+        print(f"⏱️ {name}: {count} spans, {total:.2f}s total, {total / count * 1000:.1f} ms avg")
+    for name, value in INGEST_REGISTRY.counter_values().items():
+        print(f"📈 {name}: {value:g}")
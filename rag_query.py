@@ -1,28 +1,39 @@
-from chromadb import PersistentClient
+import os
 import httpx
 import asyncio
-from typing import List
+import threading
+from typing import List, Optional
 
-# --- Connect to ChromaDB ---
-client = PersistentClient(path="./chroma_data")
-collection = client.get_or_create_collection(name="swift_chunks")
+from retrieval import Hit, CHROMA_PATH
+from shards import ShardedIndex
+from context_packer import pack_context
+from reranker import rerank, candidate_count, calibrate_cross_encoder
 
-# --- Search ChromaDB ---
-def search_context(query: str, top_k: int = 5) -> List[str]:
-    results = collection.query(
-        query_texts=[query],
-        n_results=top_k,
-        include=["documents", "metadatas"]
-    )
+# --- Configuration ---
+LLM_API_URL = os.getenv("LLM_API_URL", "http://192.168.1.5:1234/v1/chat/completions")
+BATCH_CONCURRENCY = 8  # generations in flight for rag_ask_batch
 
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
+# --- Connect to ChromaDB + lexical index (every shard), on first search ---
+_index: Optional[ShardedIndex] = None
+_index_lock = threading.Lock()
 
-    return [f"[{m.get('type', '')} {m.get('name', '')}]\n{doc}" for doc, m in zip(documents, metadatas)]
+def get_index() -> ShardedIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ShardedIndex(CHROMA_PATH)
+    return _index
+
+# --- Search (vector + BM25, reranked) ---
+def search_context(query: str, top_k: int = 5) -> List[Hit]:
+    hits = get_index().retrieve(query, candidate_count(top_k))
+    calibrate_cross_encoder(query, hits)  # once; the server does this during warm-up instead
+    return rerank(query, hits, top_k)
 
 # --- Build Prompt ---
-def build_prompt(query: str, contexts: List[str]) -> str:
-    context_block = "\n\n".join(contexts)
+def build_prompt(query: str, hits: List[Hit]) -> str:
+    context_block = "\n\n".join(pack_context(query, hits))
     return f"""
 You are an expert Swift engineer. Use the following code snippets as context to answer the question.
 
@@ -34,7 +45,7 @@ Answer:
 """
 
 # --- Query LLM ---
-async def query_phi3(prompt: str) -> str:
+async def query_phi3(prompt: str, client: Optional[httpx.AsyncClient] = None) -> str:
     payload = {
         "model": "phi-3-mini-4k-instruct",
         "messages": [
@@ -45,25 +56,47 @@ async def query_phi3(prompt: str) -> str:
         "max_tokens": 500
     }
 
-    try:
+    if client is None:
         async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post("http://192.168.1.5:1234/v1/chat/completions", json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+            return await query_phi3(prompt, client)
+
+    try:
+        response = await client.post(LLM_API_URL, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
     except Exception as e:
         return f"Error: {e}"
 
 # --- Main flow (async) ---
 async def rag_ask(query: str):
-    contexts = search_context(query)
-    prompt = build_prompt(query, contexts)
+    hits = search_context(query)
+    prompt = build_prompt(query, hits)
     print("\n--- Prompt Sent to LLM ---\n")
     print(prompt)
     print("\n--- Answer ---\n")
     answer = await query_phi3(prompt)
     print(answer)
 
+async def rag_ask_batch(queries: List[str], top_k: int = 5, concurrency: int = BATCH_CONCURRENCY) -> List[str]:
+    """Answer many queries: one embed call and one multi-query retrieval, then concurrent generation.
+
+    Answers are returned in the order of `queries`.
+    """
+    retrieved = get_index().retrieve_many(queries, candidate_count(top_k))
+    if queries:
+        calibrate_cross_encoder(queries[0], retrieved[0])
+    hits_per_query = [rerank(query, hits, top_k) for query, hits in zip(queries, retrieved)]
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        async def answer(query: str, hits: List[Hit]) -> str:
+            async with semaphore:
+                return await query_phi3(build_prompt(query, hits), client)
+
+        return await asyncio.gather(*(answer(q, hits) for q, hits in zip(queries, hits_per_query)))
+
 # --- Entry Point ---
 if __name__ == "__main__":
     asyncio.run(rag_ask("How is the BootstrapCard initialized and rendered?"))
\ No newline at end of file
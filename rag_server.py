@@ -1,36 +1,174 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import PlainTextResponse
+import time
+IMPORT_STARTED = time.perf_counter()  # startup timings in /ready are measured from here
+
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Depends, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from chromadb import PersistentClient
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, AsyncIterator, Awaitable, Dict, Any, Tuple, Union
+import functools
 import httpx
 import asyncio
-from typing import List
+import json
+import secrets
+import sys
+import threading
+import os
+
+from answer_cache import AnswerCache, ANSWER_CACHE_VERSION_CHECK
+from retrieval import Hit
+from shards import ShardedIndex, shard_path, read_shard_info
+from context_packer import pack_context
+from reranker import rerank, candidate_count, calibrate_cross_encoder, ranking_score
+from metrics import (REGISTRY, span, record_span, ANSWER_CACHE_LOOKUPS, LLM_ERRORS, REQUEST_SECONDS,
+                     TTFT_SECONDS)
+
+# --- Configuration ---
+LLM_API_URL = os.getenv("LLM_API_URL", "http://192.168.1.5:1234/v1/chat/completions")
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_data")
+LLM_ERROR_PREFIX = "Error querying model"
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "64"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # generations in flight per batch
+NO_CONTEXT_ERROR = "No context found for the query."
+QUERY_EMBEDDING_CACHE = int(os.getenv("QUERY_EMBEDDING_CACHE", "4096"))
+WARMUP_QUERY = "How is the main view initialized?"
+WARMUP_MAX_BACKOFF = 60.0  # seconds between warm-up retries, doubling from 1s
+# Shard admin endpoints are off unless a token is set; rebuilds may only read under ADMIN_SOURCE_ROOTS
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+ADMIN_SOURCE_ROOTS = [os.path.realpath(p.strip()) for p in
+                      os.getenv("ADMIN_SOURCE_ROOTS", os.getenv("SWIFT_CODEBASE_ROOT", "./BP")).split(",") if p.strip()]
+QUERY_PATHS = {"/ask", "/ask/stream", "/ask/batch", "/context"}  # first one after startup is timed
+
+# --- App-lifetime resources (created in lifespan) ---
+http_client: Optional[httpx.AsyncClient] = None
+retrieval_executor: Optional[ThreadPoolExecutor] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client, retrieval_executor
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+    http_client = httpx.AsyncClient(timeout=60, limits=limits)
+    # ChromaDB queries and query embedding are synchronous; keep them off the event loop
+    retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+    # Serve immediately; /ready turns 200 once the index and embedding model are warm
+    warmup_task = asyncio.create_task(warm_up_async())
+    version_task = asyncio.create_task(watch_index_version())
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+        version_task.cancel()
+        await http_client.aclose()
+        retrieval_executor.shutdown(wait=False)
+
+app = FastAPI(title="Swift RAG Assistant", lifespan=lifespan)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Streaming responses are timed until their headers are sent; see rag_ttft_seconds
+    elapsed = time.perf_counter() - started
+    # Labelled by route template (e.g. /admin/shards/{name}) so unmatched URLs can't add series
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(elapsed, path=getattr(route, "path", "other"))
+    if startup["first_query_ms"] is None and request.url.path in QUERY_PATHS:
+        startup["first_query_ms"] = elapsed * 1000
+    return response
+
+# --- ChromaDB + lexical index (one per shard), opened on first use ---
+_index: Optional[ShardedIndex] = None
+_index_lock = threading.Lock()
 
-app = FastAPI(title="Swift RAG Assistant")
+def get_index() -> ShardedIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                with span("index_open"):
+                    _index = ShardedIndex(CHROMA_PATH)
+    return _index
 
-# --- ChromaDB Setup ---
-client = PersistentClient(path="./chroma_data")
-collection = client.get_or_create_collection(name="swift_chunks")
+# --- Answer Cache ---
+def index_version():
+    # Ingestion rewrites a shard's manifest on every run that touches its collection. Never opens
+    # the index: before warm-up has opened it, there is nothing to invalidate
+    return _index.version() if _index is not None else None
+
+answer_cache = AnswerCache(version_fn=index_version)
+
+async def watch_index_version():
+    # Lookups never stat the manifests themselves; the cache is checked from a worker thread instead
+    while True:
+        try:
+            await run_retrieval(answer_cache.check_version)
+        except Exception as e:
+            print(f"⚠️ Answer cache version check failed: {e}")
+        await asyncio.sleep(ANSWER_CACHE_VERSION_CHECK)
 
 # --- Request schema ---
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 5
+
+class ContextRequest(BaseModel):
+    query: str
+    top_k: int = 5
+    type: Union[str, List[str], None] = None  # e.g. "func" or ["class", "struct"]
+    path_prefix: Optional[str] = None  # directory, e.g. "BP/Components"
+    include_summary: bool = False
+    include_code: bool = True
+    shards: Optional[List[str]] = None  # default: every shard
+
+class RebuildRequest(BaseModel):
+    source_root: Optional[str] = None  # default: the root the shard was last ingested from
+
 # --- Search context ---
-def search_context(query: str, top_k: int = 5) -> List[str]:
-    results = collection.query(
-        query_texts=[query],
-        n_results=top_k,
-        include=["documents", "metadatas"]
-    )
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-    return [f"[{m.get('type', '')} {m.get('name', '')}]\n{doc}" for doc, m in zip(documents, metadatas)]
+@functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE)
+def embed_query(query: str) -> List[float]:
+    with span("embed"):
+        return get_index().embed([query])[0]
+
+def rerank_hits(query: str, hits: List[Hit], top_k: int) -> List[Hit]:
+    with span("rerank", candidates=len(hits)):
+        return rerank(query, hits, top_k)
+
+def search_context(query: str, top_k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Hit]:
+    # Hybrid: vector and BM25 candidates fused by reciprocal rank, then reranked down to top_k
+    with span("retrieve"):
+        hits = get_index().retrieve(query, candidate_count(top_k), query_embedding)
+    return rerank_hits(query, hits, top_k)
+
+async def run_retrieval(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(retrieval_executor, fn, *args)
+
+async def search_context_async(query: str, top_k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Hit]:
+    return await run_retrieval(search_context, query, top_k, query_embedding)
+
+async def cached_answer(query: str, top_k: int) -> Tuple[Optional[str], Optional[List[float]]]:
+    """Return (answer, None) on a cache hit, otherwise (None, query embedding) for retrieval."""
+    answer = answer_cache.get_exact(query, top_k)
+    if answer is not None:
+        ANSWER_CACHE_LOOKUPS.inc(result="exact")
+        return answer, None
+    query_embedding = await run_retrieval(embed_query, query)
+    answer = answer_cache.get_similar(top_k, query_embedding)
+    ANSWER_CACHE_LOOKUPS.inc(result="semantic" if answer is not None else "miss")
+    return answer, query_embedding
 
 # --- Prompt builder ---
-def build_prompt(query: str, contexts: List[str]) -> str:
-    context_block = "\n\n".join(contexts)
+def build_prompt(query: str, hits: List[Hit], budget: Optional[int] = None) -> str:
+    # Deduplicated, trimmed snippets in relevance order, within CONTEXT_TOKEN_BUDGET
+    with span("prompt_build", hits=len(hits)):
+        context_block = "\n\n".join(pack_context(query, hits, budget))
     return f"""
 You are an expert Swift engineer. Use the following code snippets as context to answer the question.
 
@@ -42,33 +180,345 @@ Answer:
 """
 
 # --- LLM Query ---
-async def query_phi3(prompt: str) -> str:
-    payload = {
+def phi3_payload(prompt: str, stream: bool = False) -> dict:
+    return {
         "model": "phi-3-mini-4k-instruct",
         "messages": [
             {"role": "system", "content": "You are a helpful and accurate assistant."},
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.2,
-        "max_tokens": 800
+        "max_tokens": 800,
+        "stream": stream
     }
 
+async def query_phi3(prompt: str) -> str:
+    payload = phi3_payload(prompt)
+
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post("http://192.168.1.5:1234/v1/chat/completions", json=payload)
+        with span("generate"):
+            response = await http_client.post(LLM_API_URL, json=payload)
             response.raise_for_status()
             data = response.json()
             return data["choices"][0]["message"]["content"]
     except Exception as e:
-        return f"Error querying model: {e}"
+        LLM_ERRORS.inc(stage="answer")
+        return f"{LLM_ERROR_PREFIX}: {e}"
+
+async def stream_phi3(prompt: str) -> AsyncIterator[str]:
+    # Relay OpenAI-style SSE deltas as soon as the model produces them
+    async with http_client.stream("POST", LLM_API_URL, json=phi3_payload(prompt, stream=True)) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                yield token
 
 # --- FastAPI Endpoint ---
 @app.post("/ask", response_class=PlainTextResponse)
 async def ask_question(request: QueryRequest):
-    contexts = search_context(request.query, request.top_k)
-    if not contexts:
-        raise HTTPException(status_code=404, detail="No context found for the query.")
+    answer, query_embedding = await cached_answer(request.query, request.top_k)
+    if answer is not None:
+        return answer
 
-    prompt = build_prompt(request.query, contexts)
+    hits = await search_context_async(request.query, request.top_k, query_embedding)
+    if not hits:
+        raise HTTPException(status_code=404, detail=NO_CONTEXT_ERROR)
+
+    prompt = build_prompt(request.query, hits)
     answer = await query_phi3(prompt)
-    return answer
\ No newline at end of file
+    if not answer.startswith(LLM_ERROR_PREFIX):
+        answer_cache.put(request.query, request.top_k, answer, query_embedding)
+    return answer
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return answer_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QueryRequest, format: str = "sse"):
+    started = time.perf_counter()
+    as_sse = format != "text"
+    media_type = "text/event-stream" if as_sse else "text/plain; charset=utf-8"
+
+    answer, query_embedding = await cached_answer(request.query, request.top_k)
+    if answer is not None:
+        async def replay() -> AsyncIterator[str]:
+            yield sse_event({"token": answer}) if as_sse else answer
+            if as_sse:
+                total_ms = (time.perf_counter() - started) * 1000
+                yield sse_event({"ttft_ms": total_ms, "total_ms": total_ms, "cached": True}, event="done")
+        return StreamingResponse(replay(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+    hits = await search_context_async(request.query, request.top_k, query_embedding)
+    if not hits:
+        raise HTTPException(status_code=404, detail=NO_CONTEXT_ERROR)
+
+    prompt = build_prompt(request.query, hits)
+
+    async def relay() -> AsyncIterator[str]:
+        ttft_ms = None
+        tokens = []
+        generate_started = time.perf_counter()
+        try:
+            async for token in stream_phi3(prompt):
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    TTFT_SECONDS.observe(ttft_ms / 1000)
+                    print(f"⏱️ Time to first token: {ttft_ms:.0f} ms")
+                tokens.append(token)
+                yield sse_event({"token": token}) if as_sse else token
+        except Exception as e:
+            LLM_ERRORS.inc(stage="answer")
+            error = f"{LLM_ERROR_PREFIX}: {e}"
+            yield sse_event({"error": error}, event="error") if as_sse else error
+        else:
+            answer_cache.put(request.query, request.top_k, "".join(tokens), query_embedding)
+        record_span("generate", time.perf_counter() - generate_started, streamed=True)
+        total_ms = (time.perf_counter() - started) * 1000
+        if as_sse:
+            yield sse_event({"ttft_ms": ttft_ms, "total_ms": total_ms}, event="done")
+
+    return StreamingResponse(relay(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+# --- Retrieval-only Endpoint ---
+def retrieve_context(request: ContextRequest) -> List[Hit]:
+    # Embedding and retrieval in one executor hop
+    query_embedding = embed_query(request.query)
+    with span("retrieve"):
+        hits = get_index().retrieve(
+            request.query, candidate_count(request.top_k), query_embedding,
+            types=request.type, path_prefix=request.path_prefix, shards=request.shards
+        )
+    hits = rerank_hits(request.query, hits, request.top_k)
+    if request.include_summary:
+        get_index().fill_summaries(hits)
+    return hits
+
+def context_result(hit: Hit, include_summary: bool, include_code: bool) -> Dict[str, Any]:
+    metadata = hit["metadata"]
+    result = {
+        "id": hit["id"],
+        "filepath": metadata.get("filepath", ""),
+        "start_line": metadata.get("start_line", 0),
+        "end_line": metadata.get("end_line", 0),
+        "type": metadata.get("type", ""),
+        "name": metadata.get("name", ""),
+        "parent": metadata.get("parent", ""),
+        "shard": hit["shard"],
+        "score": ranking_score(hit),  # what the results are ordered by
+        "retrieval_score": hit["score"],  # fused vector + BM25 score before reranking
+    }
+    if include_code:
+        result["content"] = hit["document"]
+    if include_summary:
+        result["summary"] = hit["summary"]
+    return result
+
+@app.post("/context")
+async def get_context(request: ContextRequest):
+    """Retrieved chunks as structured results, without calling the LLM."""
+    started = time.perf_counter()
+    hits = await run_retrieval(retrieve_context, request)
+    return {
+        "results": [context_result(hit, request.include_summary, request.include_code) for hit in hits],
+        "took_ms": (time.perf_counter() - started) * 1000,
+    }
+
+# --- Batch Endpoint ---
+async def batch_jobs(queries: List[str], top_k: int) -> List[Awaitable[Dict[str, Any]]]:
+    """One awaitable result per query: cache lookups first, then one embed call and one
+    multi-query retrieval for every miss, then generations limited to BATCH_CONCURRENCY."""
+    results: Dict[int, Dict[str, Any]] = {}
+    misses = []
+    for i, query in enumerate(queries):
+        answer = answer_cache.get_exact(query, top_k)
+        if answer is not None:
+            ANSWER_CACHE_LOOKUPS.inc(result="exact")
+            results[i] = {"index": i, "query": query, "answer": answer, "cached": True}
+        else:
+            misses.append(i)
+
+    to_generate = []
+    if misses:
+        with span("embed", queries=len(misses)):
+            embeddings = await run_retrieval(lambda: get_index().embed([queries[i] for i in misses]))
+        for i, query_embedding in zip(misses, embeddings):
+            answer = answer_cache.get_similar(top_k, query_embedding)
+            ANSWER_CACHE_LOOKUPS.inc(result="semantic" if answer is not None else "miss")
+            if answer is not None:
+                results[i] = {"index": i, "query": queries[i], "answer": answer, "cached": True}
+            else:
+                to_generate.append((i, query_embedding))
+    def retrieve_and_rerank() -> List[List[Hit]]:
+        # Reranking can take RERANK_BUDGET_MS per query, so it runs in the same executor hop
+        with span("retrieve", queries=len(to_generate)):
+            retrieved = get_index().retrieve_many(
+                [queries[i] for i, _ in to_generate], candidate_count(top_k), [e for _, e in to_generate]
+            )
+        return [rerank_hits(queries[i], hits, top_k) for (i, _), hits in zip(to_generate, retrieved)]
+
+    hits_per_query = await run_retrieval(retrieve_and_rerank) if to_generate else []
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def ready(result: Dict[str, Any]) -> Dict[str, Any]:
+        return result
+
+    async def generate(i: int, query_embedding, hits) -> Dict[str, Any]:
+        query = queries[i]
+        if not hits:
+            return {"index": i, "query": query, "error": NO_CONTEXT_ERROR}
+        async with semaphore:
+            answer = await query_phi3(build_prompt(query, hits))
+        if answer.startswith(LLM_ERROR_PREFIX):
+            return {"index": i, "query": query, "error": answer}
+        answer_cache.put(query, top_k, answer, query_embedding)
+        return {"index": i, "query": query, "answer": answer, "cached": False}
+
+    jobs = [ready(result) for result in results.values()]
+    jobs += [generate(i, e, hits) for (i, e), hits in zip(to_generate, hits_per_query)]
+    return jobs
+
+@app.post("/ask/batch")
+async def ask_batch(request: BatchQueryRequest, stream: bool = False):
+    if len(request.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+    jobs = await batch_jobs(request.queries, request.top_k)
+
+    if not stream:
+        results = await asyncio.gather(*jobs)
+        return {"results": sorted(results, key=lambda result: result["index"])}
+
+    async def ndjson() -> AsyncIterator[str]:
+        # One JSON line per query as soon as its answer is ready; "index" gives its position
+        for job in asyncio.as_completed(jobs):
+            yield json.dumps(await job) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+# --- Shard Admin Endpoints ---
+def require_admin(authorization: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them.")
+    if not authorization or not secrets.compare_digest(authorization, f"Bearer {ADMIN_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+def allowed_source_root(source_root: str, cwd: str) -> bool:
+    path = os.path.realpath(os.path.join(cwd, source_root))
+    return any(path == root or path.startswith(root + os.sep) for root in ADMIN_SOURCE_ROOTS)
+
+@app.get("/admin/shards", dependencies=[Depends(require_admin)])
+async def list_shards():
+    return {"shards": await run_retrieval(lambda: get_index().describe())}
+
+async def rebuild_shard(name: str, source_root: str, cwd: str):
+    # Ingestion runs as its own process against the shard's directory only. Same root and working
+    # directory as the original run, so chunk filepaths and ids come out the same
+    env = dict(os.environ, CHROMA_PATH=os.path.abspath(CHROMA_PATH), SHARD=name,
+               SWIFT_CODEBASE_ROOT=source_root, INDEX_MODE="full")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Parser_chroma.py")
+    try:
+        process = await asyncio.create_subprocess_exec(sys.executable, script, env=env, cwd=cwd)
+        code = await process.wait()
+        print(f"{'✅' if code == 0 else '❌'} Rebuild of shard {name} exited with {code}")
+    finally:
+        get_index().set_available(name, True)
+
+@app.post("/admin/shards/{name}/rebuild", status_code=202, dependencies=[Depends(require_admin)])
+async def rebuild_shard_endpoint(name: str, background_tasks: BackgroundTasks, request: Optional[RebuildRequest] = None):
+    try:
+        path = shard_path(name, CHROMA_PATH)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request and request.source_root:
+        source_root, cwd = request.source_root, os.getcwd()
+    else:
+        info = read_shard_info(path) or {}
+        source_root, cwd = info.get("source_root"), info.get("cwd") or os.getcwd()
+    if not source_root:
+        raise HTTPException(status_code=404, detail=f"Unknown shard {name}; pass source_root to create it.")
+    if not allowed_source_root(source_root, cwd):
+        raise HTTPException(status_code=403, detail=f"{source_root} is not under ADMIN_SOURCE_ROOTS.")
+    sharded = await run_retrieval(get_index)
+    if name in sharded.unavailable:
+        raise HTTPException(status_code=409, detail=f"Shard {name} is already being rebuilt.")
+    # Out of queries until ingestion finishes; every other shard keeps serving
+    sharded.set_available(name, False)
+    background_tasks.add_task(rebuild_shard, name, source_root, cwd)
+    return {"shard": name, "source_root": source_root, "status": "rebuilding"}
+
+@app.delete("/admin/shards/{name}", dependencies=[Depends(require_admin)])
+async def drop_shard(name: str):
+    try:
+        shard_path(name, CHROMA_PATH)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sharded = await run_retrieval(get_index)
+    if name in sharded.unavailable:
+        raise HTTPException(status_code=409, detail=f"Shard {name} is being rebuilt.")
+    if not await run_retrieval(sharded.drop, name):
+        raise HTTPException(status_code=404, detail=f"Unknown shard {name}.")
+    return {"shard": name, "status": "dropped"}
+
+# --- Warm-up + Readiness ---
+startup: Dict[str, Any] = {"import_ms": None, "warmup_ms": None, "ready_ms": None, "first_query_ms": None,
+                           "error": None}
+
+def warm_up():
+    """Open every shard and answer one query end to end without the LLM, so the embedding
+    model, HNSW segments, lexical indexes and cross-encoder are loaded before the first real request.
+
+    Stages are recorded as warmup_* spans, and the query bypasses the embedding cache,
+    so the warm-up doesn't show up in request metrics.
+    """
+    sharded = get_index()
+    with span("warmup_embed"):
+        query_embedding = sharded.embed([WARMUP_QUERY])[0]
+    with span("warmup_retrieve"):
+        hits = sharded.retrieve(WARMUP_QUERY, candidate_count(5), query_embedding)
+    with span("warmup_rerank"):
+        calibrate_cross_encoder(WARMUP_QUERY, hits)
+        pack_context(WARMUP_QUERY, rerank(WARMUP_QUERY, hits, 5))
+
+async def warm_up_async():
+    started = time.perf_counter()
+    backoff = 1.0
+    while True:
+        try:
+            with span("warmup"):
+                await run_retrieval(warm_up)
+            break
+        except Exception as e:
+            # e.g. the embedding model could not be downloaded yet; /ready stays 503 meanwhile
+            startup["error"] = f"Warm-up failed: {e}"
+            print(f"⚠️ {startup['error']}; retrying in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WARMUP_MAX_BACKOFF)
+    startup["error"] = None
+    startup["warmup_ms"] = (time.perf_counter() - started) * 1000
+    startup["ready_ms"] = (time.perf_counter() - IMPORT_STARTED) * 1000
+    print(f"🔥 Ready in {startup['ready_ms']:.0f} ms (import {startup['import_ms']:.0f} ms, "
+          f"warm-up {startup['warmup_ms']:.0f} ms)")
+
+@app.get("/ready")
+async def readiness():
+    """200 once warm-up has finished, 503 before; both report the startup timings."""
+    body = {"ready": startup["ready_ms"] is not None, **startup}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+startup["import_ms"] = (time.perf_counter() - IMPORT_STARTED) * 1000
@@ -0,0 +1,149 @@
+import os
+import re
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from lexical_index import tokenize
+
+# --- Configuration ---
+RERANK_MODE = os.getenv("RERANK_MODE", "features")  # "off", "features" or "cross-encoder"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))  # retrieved before reranking down to top_k
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "50"))  # cross-encoder time per query
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BATCH = 8
+
+# Feature weights; the retrieval prior keeps ties in fused-rank order
+FEATURE_WEIGHTS = {
+    "prior": 1.0,
+    "name_exact": 3.0,
+    "name_overlap": 1.0,
+    "type_match": 0.5,
+    "path_overlap": 0.5,
+    "summary_similarity": 1.0,
+    "vector_similarity": 0.5,
+}
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_TYPE_WORDS = {
+    "class": "class", "struct": "struct", "enum": "enum", "protocol": "protocol", "extension": "extension",
+    "actor": "actor", "func": "func", "function": "func", "method": "func", "init": "init",
+    "initializer": "init",
+}
+
+Hit = Dict[str, Any]
+
+# --- Feature scorer ---
+def feature_score(hit: Hit, query_words: Set[str], query_terms: Set[str], query_types: Set[str], prior: float) -> float:
+    metadata = hit["metadata"]
+    name = metadata.get("name") or ""
+    name_terms = set(tokenize(name))
+    path_terms = set(tokenize(metadata.get("filepath", "").replace("/", " ").replace(".swift", "")))
+    features = {
+        "prior": prior,
+        # The declaration the user named, rather than a helper that merely calls it
+        "name_exact": 1.0 if name and name.lower() in query_words else 0.0,
+        "name_overlap": len(name_terms & query_terms) / len(name_terms) if name_terms else 0.0,
+        "type_match": 1.0 if metadata.get("type") in query_types else 0.0,
+        "path_overlap": min(len(path_terms & query_terms), 2) / 2,
+        "summary_similarity": hit.get("summary_similarity") or 0.0,
+        "vector_similarity": hit.get("vector_similarity") or 0.0,
+    }
+    return sum(FEATURE_WEIGHTS[key] * value for key, value in features.items())
+
+def rerank_features(query: str, hits: List[Hit]) -> List[Hit]:
+    query_words = {word.lower() for word in _WORD_RE.findall(query)}
+    query_terms = set(tokenize(query))
+    query_types = {_TYPE_WORDS[word] for word in query_words if word in _TYPE_WORDS}
+    top_score = max((hit["score"] for hit in hits), default=0.0) or 1.0
+    for hit in hits:
+        hit["rerank_score"] = feature_score(hit, query_words, query_terms, query_types, hit["score"] / top_score)
+    return sorted(hits, key=lambda hit: hit["rerank_score"], reverse=True)
+
+# --- Optional cross-encoder ---
+_cross_encoder = None
+_cross_encoder_failed = False
+_seconds_per_pair: Optional[float] = None  # moving average, used to stay inside the budget; set by calibration
+
+def get_cross_encoder():
+    global _cross_encoder, _cross_encoder_failed
+    if _cross_encoder is None and not _cross_encoder_failed:
+        try:
+            from sentence_transformers import CrossEncoder
+            _cross_encoder = CrossEncoder(RERANK_MODEL, device="cpu")
+        except Exception as e:  # not installed, or the model can't be loaded
+            _cross_encoder_failed = True
+            print(f"⚠️ Cross-encoder unavailable, using feature reranking: {e}")
+    return _cross_encoder
+
+def _pairs(query: str, hits: List[Hit]) -> List[Tuple[str, str]]:
+    return [(query, f"{hit['metadata'].get('name', '')}\n{hit['document']}") for hit in hits]
+
+def calibrate_cross_encoder(query: str, hits: List[Hit], mode: str = RERANK_MODE):
+    """Load the model and time one batch, outside any request.
+
+    Until this has run, rerank_cross_encoder keeps the feature order, since the first
+    call would otherwise load the model and score a batch with no cost estimate.
+    """
+    global _seconds_per_pair
+    if mode != "cross-encoder" or _seconds_per_pair is not None:
+        return
+    model = get_cross_encoder()
+    if model is None:
+        return
+    pairs = _pairs(query, hits[:RERANK_BATCH]) or [(query, query)]
+    model.predict(pairs)  # the first call also initializes the runtime
+    started = time.perf_counter()
+    model.predict(pairs)
+    _seconds_per_pair = (time.perf_counter() - started) / len(pairs)
+    print(f"🎯 Cross-encoder calibrated: {_seconds_per_pair * 1000:.1f} ms per pair")
+
+def rerank_cross_encoder(query: str, hits: List[Hit], top_k: int, budget_ms: float) -> List[Hit]:
+    """Rescore feature-ranked hits in batches until the latency budget would be exceeded.
+
+    Scored hits come first in cross-encoder order; the rest keep their feature order.
+    Before calibrate_cross_encoder has run, every hit keeps its feature order.
+    """
+    global _seconds_per_pair
+    model = _cross_encoder
+    if model is None or _seconds_per_pair is None:
+        return hits
+    deadline = time.perf_counter() + budget_ms / 1000
+    scored = 0
+    while scored < len(hits):
+        batch = hits[scored:scored + RERANK_BATCH]
+        expected = _seconds_per_pair * len(batch)
+        if time.perf_counter() + expected > deadline:
+            break
+        started = time.perf_counter()
+        scores = model.predict(_pairs(query, batch))
+        elapsed = (time.perf_counter() - started) / len(batch)
+        _seconds_per_pair = 0.8 * _seconds_per_pair + 0.2 * elapsed
+        for hit, score in zip(batch, scores):
+            hit["cross_score"] = float(score)
+        scored += len(batch)
+    if scored < min(top_k, len(hits)):
+        print(f"⏱️ Rerank budget reached after {scored} of {len(hits)} candidates")
+    head = sorted(hits[:scored], key=lambda hit: hit["cross_score"], reverse=True)
+    return head + hits[scored:]
+
+# --- Entry point ---
+def rerank(query: str, hits: List[Hit], top_k: int, mode: str = RERANK_MODE,
+           budget_ms: float = RERANK_BUDGET_MS) -> List[Hit]:
+    """Best `top_k` of the retrieved candidates for `query`."""
+    if mode == "off" or not hits:
+        return hits[:top_k]
+    ranked = rerank_features(query, hits)
+    if mode == "cross-encoder":
+        ranked = rerank_cross_encoder(query, ranked, top_k, budget_ms)
+    return ranked[:top_k]
+
+def ranking_score(hit: Hit) -> float:
+    """The score `rerank` ordered `hit` by: cross-encoder, feature or fused retrieval score.
+
+    Cross-encoder scores are on their own scale; candidates scored by it always come first.
+    """
+    return hit.get("cross_score", hit.get("rerank_score", hit["score"]))
+
+def candidate_count(top_k: int, mode: str = RERANK_MODE) -> int:
+    """How many hits to retrieve so reranking has a wider pool than `top_k`."""
+    return top_k if mode == "off" else max(top_k, RERANK_CANDIDATES)
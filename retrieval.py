@@ -0,0 +1,218 @@
+import os
+from typing import List, Dict, Any, Optional, Sequence, Iterator, Tuple, Union
+
+from lexical_index import LexicalIndexHandle, LEXICAL_INDEX_FILENAME, build_lexical_index
+
+# --- Configuration ---
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_data")
+COLLECTION_NAME = "swift_chunks"
+SUMMARY_COLLECTION_NAME = "swift_summaries"  # LLM summaries, stored under their chunk's id
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # per retriever, before fusion
+RRF_K = 60
+LEXICAL_PAGE_SIZE = 5000
+PATH_PREFIX_DEPTH = 8  # directory levels stored as dir_N metadata for prefix filters
+
+Hit = Dict[str, Any]
+
+# --- Lexical index build ---
+def lexical_text(document: str, metadata: Dict[str, Any]) -> str:
+    # Symbol names are indexed next to the code so a declaration ranks above its call sites
+    return f"{metadata.get('name', '')} {metadata.get('parent', '')}\n{document}"
+
+def iter_collection(collection, page_size: int = LEXICAL_PAGE_SIZE) -> Iterator[Tuple[str, str]]:
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        ids = page["ids"]
+        if not ids:
+            return
+        for doc_id, document, metadata in zip(ids, page["documents"], page["metadatas"]):
+            yield doc_id, lexical_text(document or "", metadata or {})
+        offset += len(ids)
+
+def rebuild_lexical_index(collection, chroma_path: str = CHROMA_PATH) -> int:
+    """Rebuild `lexical.idx` next to the collection from everything currently stored in it."""
+    path = os.path.join(chroma_path, LEXICAL_INDEX_FILENAME)
+    count = build_lexical_index(iter_collection(collection), path)
+    print(f"🔤 Lexical index: {count} chunks -> {path}")
+    return count
+
+# --- Metadata filters ---
+def normalize_path(path: str) -> str:
+    path = path.replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path.strip("/")
+
+def path_prefix_metadata(filepath: str) -> Dict[str, str]:
+    """dir_1..dir_N hold the file's ancestor directories, so a path prefix becomes an equality filter."""
+    dirs = normalize_path(filepath).split("/")[:-1]
+    return {f"dir_{depth}": "/".join(dirs[:depth]) for depth in range(1, min(len(dirs), PATH_PREFIX_DEPTH) + 1)}
+
+def build_where(types: Union[str, List[str], None] = None, path_prefix: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """ChromaDB `where` clause for a chunk type (or list of types) and a directory prefix."""
+    clauses = []
+    if types:
+        clauses.append({"type": types} if isinstance(types, str) else {"type": {"$in": list(types)}})
+    if path_prefix:
+        dirs = normalize_path(path_prefix).split("/")
+        depth = min(len(dirs), PATH_PREFIX_DEPTH)
+        clauses.append({f"dir_{depth}": "/".join(dirs[:depth])})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _under_prefix(metadata: Dict[str, Any], path_prefix: Optional[str]) -> bool:
+    # Only needed past PATH_PREFIX_DEPTH, where the pushed-down filter is coarser than the prefix
+    if not path_prefix or len(normalize_path(path_prefix).split("/")) <= PATH_PREFIX_DEPTH:
+        return True
+    return normalize_path(metadata.get("filepath", "")).startswith(normalize_path(path_prefix) + "/")
+
+# --- Fusion ---
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def _similarity(distance: float) -> float:
+    # Collections use ChromaDB's default squared-L2 space; embeddings are unit length
+    return 1.0 - distance / 2.0
+
+def format_context(hit: Hit) -> str:
+    metadata = hit["metadata"]
+    return f"[{metadata.get('type', '')} {metadata.get('name', '')}]\n{hit['document']}"
+
+# --- Hybrid Index ---
+class ChunkIndex:
+    """Code and summary collections plus the BM25 index, queried together and fused with RRF.
+
+    Summary hits share their chunk's id, so they vote for and resolve to the code chunk.
+    """
+
+    def __init__(self, path: str = CHROMA_PATH, embedding_function: Optional[Any] = None):
+        # Imported here: chromadb takes ~0.5s to import, which servers and CLIs pay only when opening an index
+        from chromadb import PersistentClient
+        from chromadb.utils import embedding_functions
+
+        self.path = path
+        self.client = PersistentClient(path=path)
+        # Same default model the collection embeds documents with; used to embed queries once
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        self.collection = self.client.get_or_create_collection(
+            name=COLLECTION_NAME, embedding_function=self.embedding_function
+        )
+        self.summaries = self.client.get_or_create_collection(
+            name=SUMMARY_COLLECTION_NAME, embedding_function=self.embedding_function
+        )
+        self.lexical = LexicalIndexHandle(os.path.join(path, LEXICAL_INDEX_FILENAME))
+
+    def release(self, stop: bool = False):
+        """Forget chromadb's shared client for this path, so the next ChunkIndex here loads
+        what other processes (ingestion) wrote since; clients for one path share segment caches."""
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        identifier = self.client._identifier
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        SharedSystemClient._identifier_to_refcount.pop(identifier, None)
+        if stop and system is not None:
+            system.stop()
+
+    def embed(self, queries: List[str]) -> List[Any]:
+        return list(self.embedding_function(queries))
+
+    def retrieve(self, query: str, top_k: int = 5, query_embedding: Optional[Any] = None, **filters) -> List[Hit]:
+        embeddings = [query_embedding] if query_embedding is not None else None
+        return self.retrieve_many([query], top_k, embeddings, **filters)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        query_embeddings: Optional[List[Any]] = None,
+        types: Union[str, List[str], None] = None,
+        path_prefix: Optional[str] = None,
+        with_summaries: bool = False,
+    ) -> List[List[Hit]]:
+        """Top `top_k` chunks per query: code, summary and BM25 candidates fused by reciprocal rank.
+
+        `types` and `path_prefix` are pushed down to ChromaDB as a `where` clause; BM25
+        candidates are filtered by the same clause when their chunks are fetched.
+        """
+        if query_embeddings is None:
+            query_embeddings = self.embed(queries)
+        where = build_where(types, path_prefix)
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=candidates,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        summary_results = self.summaries.query(
+            query_embeddings=query_embeddings,
+            n_results=candidates,
+            where=where,
+            include=["documents", "distances"]
+        )
+
+        found: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        summaries: Dict[str, str] = {}
+        # Per query: chunk id -> cosine similarity of the code / summary embedding, when retrieved
+        similarities: List[Tuple[Dict[str, float], Dict[str, float]]] = []
+        fused_per_query: List[List[Tuple[str, float]]] = []
+        for i, query in enumerate(queries):
+            vector_ids = results["ids"][i]
+            for doc_id, document, metadata in zip(vector_ids, results["documents"][i], results["metadatas"][i]):
+                found[doc_id] = (document, metadata)
+            summary_ids = summary_results["ids"][i]
+            summaries.update(zip(summary_ids, summary_results["documents"][i]))
+            similarities.append((
+                {doc_id: _similarity(d) for doc_id, d in zip(vector_ids, results["distances"][i])},
+                {doc_id: _similarity(d) for doc_id, d in zip(summary_ids, summary_results["distances"][i])},
+            ))
+            lexical_ids = [doc_id for doc_id, _ in self.lexical.search(query, candidates)]
+            fused_per_query.append(reciprocal_rank_fusion([vector_ids, summary_ids, lexical_ids]))
+
+        for doc_id, (_, metadata) in list(found.items()):
+            if not _under_prefix(metadata or {}, path_prefix):
+                del found[doc_id]
+
+        # Summary- and lexical-only hits still need their code chunk. Ids that are stale or
+        # filtered out come back empty, so widen the window until top_k survive.
+        checked = set(found)
+        window = top_k
+        while True:
+            missing = list({doc_id for fused in fused_per_query for doc_id, _ in fused[:window]} - checked)
+            if missing:
+                page = self.collection.get(ids=missing, where=where, include=["documents", "metadatas"])
+                for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    if _under_prefix(metadata or {}, path_prefix):
+                        found[doc_id] = (document, metadata)
+                checked.update(missing)
+            if all(window >= len(fused) or sum(doc_id in found for doc_id, _ in fused[:window]) >= top_k
+                   for fused in fused_per_query):
+                break
+            window *= 2
+
+        hits_per_query = [
+            [{"id": doc_id, "document": found[doc_id][0], "metadata": found[doc_id][1] or {}, "score": score,
+              "summary": summaries.get(doc_id), "vector_similarity": code_similarity.get(doc_id),
+              "summary_similarity": summary_similarity.get(doc_id)}
+             for doc_id, score in fused if doc_id in found][:top_k]
+            for fused, (code_similarity, summary_similarity) in zip(fused_per_query, similarities)
+        ]
+        if with_summaries:
+            self.fill_summaries([hit for hits in hits_per_query for hit in hits])
+        return hits_per_query
+
+    def fill_summaries(self, hits: List[Hit]):
+        missing = list({hit["id"] for hit in hits if hit["summary"] is None})
+        if not missing:
+            return
+        page = self.summaries.get(ids=missing, include=["documents"])
+        summaries = dict(zip(page["ids"], page["documents"]))
+        for hit in hits:
+            if hit["summary"] is None:
+                hit["summary"] = summaries.get(hit["id"])
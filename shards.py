@@ -0,0 +1,264 @@
+import os
+import re
+import json
+import shutil
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from index_manifest import MANIFEST_FILENAME, write_json_atomic
+from retrieval import ChunkIndex, Hit, CHROMA_PATH, COLLECTION_NAME, SUMMARY_COLLECTION_NAME
+
+# --- Configuration ---
+SHARDS_DIRNAME = "shards"  # <CHROMA_PATH>/shards/<name>/ holds one repo or module each
+SHARD_INFO_FILENAME = "shard.json"
+DEFAULT_SHARD = "default"  # CHROMA_PATH itself, i.e. an unsharded index
+SHARD_QUERY_WORKERS = int(os.getenv("SHARD_QUERY_WORKERS", "8"))
+SHARD_REFRESH_SECONDS = 5.0  # how often new or dropped shard directories are picked up
+
+_SHARD_NAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+# --- Layout ---
+def shard_path(name: str, root: str = CHROMA_PATH) -> str:
+    if name == DEFAULT_SHARD:
+        return root
+    if not _SHARD_NAME_RE.match(name):
+        raise ValueError(f"Invalid shard name: {name!r}")
+    return os.path.join(root, SHARDS_DIRNAME, name)
+
+def read_shard_info(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, SHARD_INFO_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_shard_info(path: str, name: str, source_root: str):
+    """Recorded by ingestion so the shard can be discovered and rebuilt from its source.
+
+    The root is kept as given, with the directory it was relative to: chunk filepaths and
+    ids are built from it, so a rebuild must walk the same path from the same place.
+    """
+    write_json_atomic(os.path.join(path, SHARD_INFO_FILENAME),
+                      {"name": name, "source_root": source_root, "cwd": os.getcwd()})
+
+def discover_shards(root: str = CHROMA_PATH) -> Dict[str, str]:
+    """Shard name -> directory for every ingested shard under `root`."""
+    found = {}
+    # Indexes ingested before sharding have a manifest but no shard.json
+    if any(os.path.exists(os.path.join(root, f)) for f in (SHARD_INFO_FILENAME, MANIFEST_FILENAME)):
+        found[DEFAULT_SHARD] = root
+    shards_dir = os.path.join(root, SHARDS_DIRNAME)
+    try:
+        names = sorted(os.listdir(shards_dir))
+    except OSError:
+        names = []
+    for name in names:
+        path = os.path.join(shards_dir, name)
+        if _SHARD_NAME_RE.match(name) and os.path.exists(os.path.join(path, SHARD_INFO_FILENAME)):
+            found[name] = path
+    return found
+
+def manifest_mtime(path: str) -> Optional[int]:
+    # Ingestion rewrites the manifest at the end of every run, after all its writes
+    try:
+        return os.stat(os.path.join(path, MANIFEST_FILENAME)).st_mtime_ns
+    except OSError:
+        return None
+
+# --- Sharded Index ---
+class ShardedIndex:
+    """One ChunkIndex per shard, queried in parallel and merged by fused score.
+
+    Shards are separate persistent directories, so ingesting or rebuilding one never
+    locks the others. A shard marked unavailable (e.g. while it is rebuilt) is skipped,
+    and a shard whose manifest changed since it was opened is reopened before it is queried.
+    """
+
+    def __init__(self, root: str = CHROMA_PATH, workers: int = SHARD_QUERY_WORKERS):
+        from chromadb.utils import embedding_functions  # deferred like in ChunkIndex
+
+        self.root = root
+        # One embedding model for every shard; each query is embedded once
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.shards: Dict[str, ChunkIndex] = {}
+        self.opened_at: Dict[str, Optional[int]] = {}  # manifest mtime when each shard was opened
+        self.unavailable: Set[str] = set()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()  # serializes opening, so a shard is opened once
+        self._refreshed = 0.0
+        self.refresh()
+
+    def _open(self, name: str, path: str):
+        with self._open_lock:
+            with self._lock:
+                old = self.shards.get(name)
+            mtime = manifest_mtime(path)
+            if old is not None and self.opened_at.get(name) == mtime:
+                return  # another thread reopened it already
+            if old is not None:
+                # In-flight queries finish on the old handle; new ones see the new writes
+                old.release()
+            shard = ChunkIndex(path, self.embedding_function)
+            with self._lock:
+                if name in self.unavailable:
+                    return
+                self.shards[name] = shard
+                self.opened_at[name] = mtime
+
+    def refresh(self):
+        """Open newly ingested shards and forget ones whose directory is gone."""
+        found = discover_shards(self.root)
+        with self._lock:
+            for name in [name for name in self.shards if name not in found]:
+                del self.shards[name]
+            missing = {name: path for name, path in found.items()
+                       if name not in self.shards and name not in self.unavailable}
+            self._refreshed = time.monotonic()
+        for name, path in missing.items():
+            self._open(name, path)
+
+    def active(self, names: Optional[List[str]] = None) -> Dict[str, ChunkIndex]:
+        if time.monotonic() - self._refreshed > SHARD_REFRESH_SECONDS:
+            self.refresh()
+        with self._lock:
+            shards = {name: shard for name, shard in self.shards.items()
+                      if name not in self.unavailable and (names is None or name in names)}
+        for name, shard in list(shards.items()):
+            if manifest_mtime(shard.path) != self.opened_at.get(name):
+                self._open(name, shard.path)
+                with self._lock:
+                    shards[name] = self.shards.get(name, shard)
+        return shards
+
+    def embed(self, queries: List[str]) -> List[Any]:
+        return list(self.embedding_function(queries))
+
+    def retrieve(self, query: str, top_k: int = 5, query_embedding: Optional[Any] = None, **filters) -> List[Hit]:
+        embeddings = [query_embedding] if query_embedding is not None else None
+        return self.retrieve_many([query], top_k, embeddings, **filters)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        query_embeddings: Optional[List[Any]] = None,
+        shards: Optional[List[str]] = None,
+        **filters,
+    ) -> List[List[Hit]]:
+        """ChunkIndex.retrieve_many on every active shard (or just `shards`), merged by score.
+
+        Each hit records its `shard`. A shard that fails is logged and left out.
+        """
+        if query_embeddings is None:
+            query_embeddings = self.embed(queries)
+        targets = self.active(shards)
+
+        def query_shard(name: str, shard: ChunkIndex) -> List[List[Hit]]:
+            try:
+                hits_per_query = shard.retrieve_many(queries, top_k, query_embeddings, **filters)
+            except Exception as e:
+                print(f"⚠️ Shard {name} failed, skipping it: {e}")
+                # Reopen on the next refresh
+                with self._lock:
+                    if self.shards.get(name) is shard:
+                        del self.shards[name]
+                        shard.release()
+                    self._refreshed = 0.0
+                return [[] for _ in queries]
+            for hits in hits_per_query:
+                for hit in hits:
+                    hit["shard"] = name
+            return hits_per_query
+
+        if len(targets) == 1:
+            per_shard = [query_shard(*next(iter(targets.items())))]
+        else:
+            per_shard = list(self.executor.map(lambda item: query_shard(*item), targets.items()))
+        return [
+            sorted((hit for shard_hits in per_shard for hit in shard_hits[i]),
+                   key=lambda hit: hit["score"], reverse=True)[:top_k]
+            for i in range(len(queries))
+        ]
+
+    def fill_summaries(self, hits: List[Hit]):
+        by_shard: Dict[str, List[Hit]] = {}
+        for hit in hits:
+            by_shard.setdefault(hit["shard"], []).append(hit)
+        with self._lock:
+            shards = dict(self.shards)
+        for name, shard_hits in by_shard.items():
+            if name in shards:
+                shards[name].fill_summaries(shard_hits)
+
+    # --- Admin ---
+    def version(self) -> Tuple[Any, ...]:
+        """Changes whenever any shard is ingested, rebuilt or dropped. Only stats the manifests."""
+        with self._lock:
+            shards = {name: shard.path for name, shard in self.shards.items() if name not in self.unavailable}
+        return tuple((name, manifest_mtime(path)) for name, path in sorted(shards.items()))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            shards = dict(self.shards)
+            unavailable = set(self.unavailable)
+        result = []
+        for name in sorted(set(shards) | unavailable):
+            path = shard_path(name, self.root)
+            info = read_shard_info(path) or {}
+            result.append({
+                "name": name,
+                "path": path,
+                "source_root": info.get("source_root"),
+                "status": "unavailable" if name in unavailable else "ready",
+                "chunks": shards[name].collection.count() if name in shards and name not in unavailable else None,
+            })
+        return result
+
+    def set_available(self, name: str, available: bool):
+        """Take a shard out of queries (before a rebuild) or reopen it afterwards."""
+        with self._lock:
+            if available:
+                self.unavailable.discard(name)
+                # Reopened by refresh, with fresh handles to the rebuilt collections
+                old = self.shards.pop(name, None)
+                if old is not None:
+                    old.release()
+            else:
+                self.unavailable.add(name)
+        if available:
+            self.refresh()
+
+    def drop(self, name: str) -> bool:
+        """Delete one shard's collections and its directory; other shards are untouched."""
+        path = shard_path(name, self.root)
+        with self._lock:
+            shard = self.shards.pop(name, None)
+            self.opened_at.pop(name, None)
+        if shard is None and name not in discover_shards(self.root):
+            return False
+        if shard is None:
+            shard = ChunkIndex(path, self.embedding_function)
+        for collection_name in (COLLECTION_NAME, SUMMARY_COLLECTION_NAME):
+            try:
+                shard.client.delete_collection(name=collection_name)
+            except Exception:
+                pass  # never created
+        # Stopped, so a shard created later under this name doesn't reuse the deleted store
+        shard.release(stop=True)
+        if name == DEFAULT_SHARD:
+            # The root also holds the other shards
+            for entry in os.listdir(path):
+                if entry != SHARDS_DIRNAME:
+                    entry_path = os.path.join(path, entry)
+                    if os.path.isdir(entry_path):
+                        shutil.rmtree(entry_path)
+                    else:
+                        os.remove(entry_path)
+        else:
+            shutil.rmtree(path)
+        print(f"🗑️ Dropped shard {name} ({path})")
+        return True
@@ -0,0 +1,90 @@
+import os
+import asyncio
+import random
+from typing import Optional
+import httpx
+
+from summary_cache import SummaryCache, get_summary_cache
+from metrics import SUMMARY_CACHE_LOOKUPS, SUMMARY_ERRORS
+
+# --- Configuration ---
+LLM_API_URL = os.getenv("LLM_API_URL", "http://192.168.1.5:1234/v1/chat/completions")
+LLM_MODEL = "phi-3-mini-4k-instruct"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))  # seconds, doubled per attempt
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+SUMMARY_ERROR = "Error generating summary from LLM."
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that summarizes Swift code."
+
+# --- Shared HTTP client ---
+def create_llm_client(concurrency: int = SUMMARY_CONCURRENCY) -> httpx.AsyncClient:
+    # One pooled client per run; keep-alive connections are reused across chunks
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(timeout=LLM_TIMEOUT, limits=limits)
+
+# --- Prompt ---
+def build_summary_prompt(code_chunk_content: str) -> str:
+    return (
+        f"Analyze the following Swift code snippet and provide a concise, "
+        f"high-level summary of its purpose and functionality. "
+        f"Focus on what it does, not how it's implemented in detail. "
+        f"Keep the summary to 2–3 sentences.\n\n"
+        f"```swift\n{code_chunk_content}\n```\n\nSummary:"
+    )
+
+# --- LLM Summarizer ---
+def summary_cache_key(code_chunk_content: str) -> bytes:
+    # Any change to the model or prompt wording naturally invalidates old entries
+    template = SUMMARY_SYSTEM_PROMPT + "\0" + build_summary_prompt("{code}")
+    return SummaryCache.make_key(LLM_MODEL, template, code_chunk_content)
+
+async def generate_text_summary(code_chunk_content: str, client: Optional[httpx.AsyncClient] = None) -> str:
+    if client is None:
+        async with create_llm_client(1) as own_client:
+            return await generate_text_summary(code_chunk_content, own_client)
+
+    cache = get_summary_cache()
+    cache_key = summary_cache_key(code_chunk_content) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        SUMMARY_CACHE_LOOKUPS.inc(result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+    payload = {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": build_summary_prompt(code_chunk_content)}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 150
+    }
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            response = await client.post(LLM_API_URL, json=payload)
+            response.raise_for_status()
+            result = response.json()
+            summary = result["choices"][0]["message"]["content"]
+            break
+        except Exception as e:
+            # Client errors other than rate limiting won't improve on retry
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 \
+                    and e.response.status_code != 429:
+                print(f"⚠️ Error calling LLM: {e}")
+                SUMMARY_ERRORS.inc()
+                return SUMMARY_ERROR
+            if attempt == LLM_MAX_RETRIES:
+                print(f"⚠️ Error calling LLM after {attempt + 1} attempts: {e}")
+                SUMMARY_ERRORS.inc()
+                return SUMMARY_ERROR
+            delay = LLM_RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+            print(f"🔁 LLM call failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    if cache:
+        cache.put(cache_key, summary)
+    return summary
@@ -0,0 +1,99 @@
+import os
+import time
+import sqlite3
+import hashlib
+from typing import Optional, Dict, Any
+
+# --- Configuration ---
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "./summary_cache.sqlite")  # "" disables the cache
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "200000"))
+
+# --- Summary Cache ---
+class SummaryCache:
+    """Content-addressed LLM summary store in SQLite with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key BLOB PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries(last_used)")
+        self.size = self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, prompt_template: str, content: str) -> bytes:
+        h = hashlib.sha256()
+        for part in (model, prompt_template, content):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time_ns(), key))
+        return row[0]
+
+    def put(self, key: bytes, summary: str):
+        now = time.time_ns()
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO summaries (key, summary, last_used) VALUES (?, ?, ?)",
+            (key, summary, now)
+        )
+        if cursor.rowcount:
+            self.size += 1
+            if self.size > self.max_entries:
+                self._evict()
+        else:
+            self.conn.execute(
+                "UPDATE summaries SET summary = ?, last_used = ? WHERE key = ?", (summary, now, key)
+            )
+
+    def _evict(self):
+        # Evict down to 90% so eviction does not run on every insert at the limit
+        excess = self.size - int(self.max_entries * 0.9)
+        self.conn.execute(
+            "DELETE FROM summaries WHERE key IN "
+            "(SELECT key FROM summaries ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.evictions += excess
+        self.size -= excess
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self.size,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        self.conn.close()
+
+_default_cache: Optional[SummaryCache] = None
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    global _default_cache
+    if _default_cache is None and SUMMARY_CACHE_PATH:
+        _default_cache = SummaryCache(SUMMARY_CACHE_PATH)
+    return _default_cache
@@ -0,0 +1,215 @@
+import os
+import re
+from typing import List, Dict, Any, Optional
+
+# --- Configuration ---
+SWIFT_PARSER_BACKEND = os.getenv("SWIFT_PARSER_BACKEND", "scanner")  # "scanner" or "treesitter"
+
+# --- Swift Chunker ---
+# Single pass over the source: a token regex jumps between the only characters that
+# matter (braces, quotes, comment openers, declaration keywords) while brace depth,
+# string/comment state and the current line number are tracked incrementally.
+
+DECLARATION_KEYWORDS = ("class", "struct", "enum", "protocol", "extension", "actor", "func")
+
+_KEYWORD = r'(?<![\w.`$#@])(?P<keyword>' + "|".join(DECLARATION_KEYWORDS) + r')\b'
+_TOKEN_RE = re.compile(r'(?P<comment>//|/\*)|(?P<string>#*"(?:"")?)|(?P<brace>[{}])|' + _KEYWORD)
+# While a declaration header is pending, parentheses matter too: `{` inside a
+# parameter list (a default-value closure) must not be taken as the body
+_HEADER_TOKEN_RE = re.compile(r'(?P<comment>//|/\*)|(?P<string>#*"(?:"")?)|(?P<brace>[{}()])|' + _KEYWORD)
+_INTERPOLATION_TOKEN_RE = re.compile(r'(?P<comment>//|/\*)|(?P<string>#*"(?:"")?)|(?P<brace>[()])')
+_BLOCK_COMMENT_RE = re.compile(r'/\*|\*/')
+_STRING_SPECIAL_RE = re.compile(r'[\\"\n]')
+
+_TYPE_NAME_RE = re.compile(r'\s+`?([A-Za-z_][\w.]*)')
+_FUNC_NAME_RE = re.compile(r'\s+`?([^\s(<`]+)')
+# `class` followed by one of these is a modifier (`class func`, `class var`), not a type
+_CLASS_MODIFIER_FOLLOWERS = {
+    "func", "var", "let", "subscript", "init", "deinit", "override", "final", "static",
+    "public", "internal", "fileprivate", "private", "open", "required", "convenience",
+}
+
+def _skip_block_comment(src: str, pos: int) -> int:
+    # Swift block comments nest
+    depth = 1
+    while depth:
+        m = _BLOCK_COMMENT_RE.search(src, pos)
+        if not m:
+            return len(src)
+        depth += 1 if m.group() == "/*" else -1
+        pos = m.end()
+    return pos
+
+def _skip_comment(src: str, m: re.Match) -> int:
+    if m.group("comment") == "//":
+        end = src.find("\n", m.end())
+        return len(src) if end == -1 else end
+    return _skip_block_comment(src, m.end())
+
+def _skip_string(src: str, pos: int, opener: str) -> int:
+    """Return the index just past the string literal whose opener ends at `pos`."""
+    hashes = opener.count("#")
+    multiline = opener.endswith('"""')
+    close = ('"""' if multiline else '"') + "#" * hashes
+    escape = "\\" + "#" * hashes
+    n = len(src)
+    while pos < n:
+        m = _STRING_SPECIAL_RE.search(src, pos)
+        if not m:
+            return n
+        i = m.start()
+        c = src[i]
+        if c == "\\":
+            if src.startswith(escape, i):
+                j = i + len(escape)
+                if j < n and src[j] == "(":
+                    pos = _skip_interpolation(src, j + 1)
+                else:
+                    pos = j + 1
+            else:
+                pos = i + 1
+        elif c == '"':
+            if src.startswith(close, i):
+                return i + len(close)
+            pos = i + 1
+        elif multiline:
+            pos = i + 1
+        else:
+            return i  # unterminated single-line literal: resync at end of line
+    return n
+
+def _skip_interpolation(src: str, pos: int) -> int:
+    depth = 1
+    while depth:
+        m = _INTERPOLATION_TOKEN_RE.search(src, pos)
+        if not m:
+            return len(src)
+        if m.group("comment"):
+            pos = _skip_comment(src, m)
+        elif m.group("string"):
+            pos = _skip_string(src, m.end(), m.group("string"))
+        else:
+            depth += 1 if m.group("brace") == "(" else -1
+            pos = m.end()
+    return pos
+
+def _declaration_name(src: str, keyword: str, end: int) -> Optional[str]:
+    m = (_FUNC_NAME_RE if keyword == "func" else _TYPE_NAME_RE).match(src, end)
+    return m.group(1) if m else None
+
+def chunk_swift_source(content: str, filepath: str) -> List[Dict[str, Any]]:
+    chunks: List[Dict[str, Any]] = []
+    n = len(content)
+
+    # Incremental line counter; only ever asked about increasing offsets
+    line_pos = 0
+    line_no = 1
+
+    def line_at(offset: int) -> int:
+        nonlocal line_pos, line_no
+        line_no += content.count("\n", line_pos, offset)
+        line_pos = offset
+        return line_no
+
+    def emit(start: int, end: int, chunk_type: str, name: Optional[str]):
+        text = content[start:end]
+        stripped = text.strip()
+        if not stripped:
+            return
+        first = start + len(text) - len(text.lstrip())
+        last = start + len(text.rstrip()) - 1
+        chunks.append({
+            "content": stripped,
+            "filepath": filepath,
+            "start_line": line_at(first),
+            "end_line": line_at(last),
+            "type": chunk_type,
+            "name": name
+        })
+
+    last_end = 0      # end of the previous emitted declaration
+    depth = 0         # brace depth
+    paren = 0         # paren depth inside a pending declaration header
+    decl = None       # (start, type, name) of the current top-level declaration
+    body_open = False
+    pos = 0
+
+    while pos < n:
+        m = (_HEADER_TOKEN_RE if decl and not body_open else _TOKEN_RE).search(content, pos)
+        if not m:
+            break
+        pos = m.end()
+
+        if m.group("comment"):
+            pos = _skip_comment(content, m)
+        elif m.group("string"):
+            pos = _skip_string(content, pos, m.group("string"))
+        elif m.group("brace"):
+            brace = m.group("brace")
+            if brace == "(":
+                paren += 1
+            elif brace == ")":
+                paren = max(paren - 1, 0)
+            elif brace == "{":
+                depth += 1
+                if decl and not body_open and paren == 0 and depth == 1:
+                    body_open = True
+            else:
+                depth = max(depth - 1, 0)
+                if decl and body_open and depth == 0:
+                    emit(decl[0], pos, decl[1], decl[2])
+                    last_end = pos
+                    decl = None
+        elif depth == 0 and not (decl and paren):
+            keyword = m.group("keyword")
+            name = _declaration_name(content, keyword, pos)
+            if not name or (keyword == "class" and name in _CLASS_MODIFIER_FOLLOWERS):
+                continue
+            line_start = content.rfind("\n", 0, m.start()) + 1
+            if "import" in content[line_start:m.start()].split():
+                continue
+
+            # Pull attribute and doc-comment lines directly above into the declaration
+            start = line_start
+            while start > last_end:
+                prev_start = content.rfind("\n", 0, start - 1) + 1
+                prev_line = content[prev_start:start].strip()
+                if prev_start < last_end or not prev_line.startswith(("@", "///")):
+                    break
+                start = prev_start
+            start = max(start, last_end)
+
+            if decl is None:
+                emit(last_end, start, "raw_code", None)
+            # A pending header that never opened a body (e.g. a bodyless requirement)
+            # is folded into the declaration that follows it
+            decl = (decl[0] if decl else start, keyword, name.strip("`"))
+            body_open = False
+            paren = 0
+
+    if decl:
+        emit(decl[0], n, decl[1], decl[2])
+        last_end = n
+    emit(last_end, n, "raw_code", None)
+    return chunks
+
+# --- Swift Parser ---
+def parse_swift_source(source: bytes, filepath: str) -> List[Dict[str, Any]]:
+    if SWIFT_PARSER_BACKEND == "treesitter":
+        from swift_treesitter import chunk_swift_source_treesitter
+        return chunk_swift_source_treesitter(source, filepath)
+    return chunk_swift_source(source.decode("utf-8"), filepath)
+
+def parse_swift_file(filepath: str) -> List[Dict[str, Any]]:
+    chunks = []
+    try:
+        with open(filepath, 'rb') as f:
+            source = f.read()
+
+        chunks = parse_swift_source(source, filepath)
+        print(f"🔍 Found {len(chunks)} chunks in {filepath}")
+
+    except Exception as e:
+        print(f"Error parsing file {filepath}: {e}")
+
+    return chunks
@@ -0,0 +1,179 @@
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from tree_sitter import Language, Parser, Tree, Node
+
+# --- Configuration ---
+TREESITTER_LIBRARY = os.getenv("TREESITTER_LIBRARY", "build/my-languages.so")  # built by build_languages.py
+TREESITTER_MAX_CHUNK_LINES = int(os.getenv("TREESITTER_MAX_CHUNK_LINES", "150"))
+TREESITTER_TREE_CACHE_SIZE = int(os.getenv("TREESITTER_TREE_CACHE_SIZE", "256"))
+
+TYPE_DECLARATIONS = {"class_declaration", "protocol_declaration"}
+MEMBER_DECLARATIONS = {
+    "function_declaration": "func",
+    "protocol_function_declaration": "func",
+    "init_declaration": "init",
+    "deinit_declaration": "deinit",
+    "subscript_declaration": "subscript",
+}
+
+def _common_prefix(a: bytes, b: bytes, limit: int) -> int:
+    # Binary search with slice comparisons keeps the byte loop in C
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _point(source: bytes, offset: int) -> Tuple[int, int]:
+    row = source.count(b"\n", 0, offset)
+    return row, offset - (source.rfind(b"\n", 0, offset) + 1)
+
+# --- Tree-sitter Swift Parser ---
+class TreeSitterSwiftParser:
+    """Declaration-level chunking over the tree-sitter-swift syntax tree.
+
+    Keeps the last tree per file so a re-parse after an edit reuses the
+    unchanged parts of the old tree. That only pays off for a long-lived
+    instance (an editor integration, a watcher); ingestion parses each file
+    once per run in short-lived pool workers, so it always parses from scratch.
+    """
+
+    def __init__(self, library_path: str = TREESITTER_LIBRARY, max_chunk_lines: int = TREESITTER_MAX_CHUNK_LINES):
+        self.parser = Parser()
+        self.parser.set_language(Language(library_path, "swift"))
+        self.max_chunk_lines = max_chunk_lines
+        self._trees: "OrderedDict[str, Tuple[Tree, bytes]]" = OrderedDict()
+
+    def parse(self, filepath: str, source: bytes) -> Tree:
+        cached = self._trees.pop(filepath, None)
+        if cached is None:
+            tree = self.parser.parse(source)
+        else:
+            tree = self.reparse(cached[0], cached[1], source)
+        self._trees[filepath] = (tree, source)
+        if len(self._trees) > TREESITTER_TREE_CACHE_SIZE:
+            self._trees.popitem(last=False)
+        return tree
+
+    def reparse(self, old_tree: Tree, old_source: bytes, new_source: bytes) -> Tree:
+        if old_source == new_source:
+            return old_tree
+        limit = min(len(old_source), len(new_source))
+        start = _common_prefix(old_source, new_source, limit)
+        suffix = _common_suffix(old_source, new_source, limit - start)
+        old_end = len(old_source) - suffix
+        new_end = len(new_source) - suffix
+        old_tree.edit(
+            start_byte=start,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=_point(old_source, start),
+            old_end_point=_point(old_source, old_end),
+            new_end_point=_point(new_source, new_end),
+        )
+        return self.parser.parse(new_source, old_tree)
+
+    def chunk(self, filepath: str, source: bytes) -> List[Dict[str, Any]]:
+        tree = self.parse(filepath, source)
+        line_starts = [0]
+        pos = source.find(b"\n")
+        while pos != -1:
+            line_starts.append(pos + 1)
+            pos = source.find(b"\n", pos + 1)
+
+        chunks: List[Dict[str, Any]] = []
+
+        def emit(start: int, end: int, chunk_type: str, name: Optional[str], parent: Optional[str]):
+            raw = source[start:end]
+            stripped = raw.strip()
+            if not stripped or stripped in (b"{", b"}"):
+                return
+            first = start + len(raw) - len(raw.lstrip())
+            last = start + len(raw.rstrip())
+            chunks.append({
+                "content": stripped.decode("utf-8", errors="replace"),
+                "filepath": filepath,
+                "start_line": bisect_right(line_starts, first),
+                "end_line": bisect_right(line_starts, last - 1),
+                "start_byte": first,
+                "end_byte": last,
+                "type": chunk_type,
+                "name": name,
+                "parent": parent,
+            })
+
+        def walk(nodes: List[Node], start: int, end: int, parent: Optional[str],
+                 head: Tuple[str, Optional[str], Optional[str]]):
+            # `head` labels the text before the first declaration: a split type's header
+            cursor = start
+            for node in nodes:
+                kind = self._kind(node)
+                if kind is None:
+                    continue
+                decl_start = self._leading_doc_start(node)
+                emit(cursor, decl_start, *head)
+                head = ("raw_code", None, parent)
+
+                name = self._name(node)
+                body = node.child_by_field_name("body")
+                lines = node.end_point[0] - node.start_point[0] + 1
+                if node.type in TYPE_DECLARATIONS and body is not None and lines > self.max_chunk_lines:
+                    qualified = f"{parent}.{name}" if parent and name else name
+                    walk(body.named_children, decl_start, node.end_byte, qualified, (kind, name, parent))
+                else:
+                    emit(decl_start, node.end_byte, kind, name, parent)
+                cursor = node.end_byte
+            emit(cursor, end, *head)
+
+        walk(tree.root_node.named_children, 0, len(source), None, ("raw_code", None, None))
+        return chunks
+
+    @staticmethod
+    def _kind(node: Node) -> Optional[str]:
+        if node.type in TYPE_DECLARATIONS:
+            kind = node.child_by_field_name("declaration_kind")
+            return kind.type if kind is not None else "class"
+        return MEMBER_DECLARATIONS.get(node.type)
+
+    @staticmethod
+    def _name(node: Node) -> Optional[str]:
+        name = node.child_by_field_name("name")
+        if name is None:
+            return None
+        return name.text.decode("utf-8", errors="replace").strip("`")
+
+    @staticmethod
+    def _leading_doc_start(node: Node) -> int:
+        # Doc comments are siblings in the tree; keep them with their declaration
+        start = node.start_byte
+        row = node.start_point[0]
+        prev = node.prev_sibling
+        while prev is not None and prev.type == "comment" and prev.end_point[0] == row - 1 \
+                and prev.text.startswith(b"///"):
+            start = prev.start_byte
+            row = prev.start_point[0]
+            prev = prev.prev_sibling
+        return start
+
+_default_parser: Optional[TreeSitterSwiftParser] = None  # one per parse worker process
+
+def chunk_swift_source_treesitter(source: bytes, filepath: str) -> List[Dict[str, Any]]:
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = TreeSitterSwiftParser()
+    return _default_parser.chunk(filepath, source)
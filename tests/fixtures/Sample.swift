@@ -0,0 +1,44 @@
+import SwiftUI
+
+/// A card shown on the home screen.
+@MainActor
+final class BootstrapCard: View {
+    struct Style {
+        var cornerRadius: Double = 8
+    }
+
+    enum Kind { case small, large }
+
+    let title = "not a { brace"
+    let template = """
+        } also not a brace {
+        """
+
+    // a stray } in a comment
+    /* and a { in /* a nested */ block comment */
+    func render(
+        title: String,
+        onTap: () -> Void = { print("tapped }") }
+    ) -> some View {
+        Text("\(title) { \("}") }")
+    }
+}
+
+extension BootstrapCard {
+    func configure(with style: Style,
+                   animated: Bool) {
+        let raw = #"a "quoted" } brace"#
+        print(raw)
+    }
+}
+
+protocol Renderable {
+    func render() -> String
+}
+
+func makeCard(
+    title: String = "{",
+    build: (String) -> Void = { _ in }
+) -> BootstrapCard {
+    BootstrapCard()
+}
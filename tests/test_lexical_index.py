@@ -0,0 +1,60 @@
+import pytest
+
+import lexical_index
+from lexical_index import LexicalIndex, LexicalIndexHandle, build_lexical_index, tokenize
+from retrieval import reciprocal_rank_fusion, RRF_K
+
+DOCS = [
+    ("login", "func presentLoginSheet() { showSheet(LoginView()) }"),
+    ("logout", "func logout() { session.clear() }"),
+    ("sheet", "struct SheetStyle { let cornerRadius = 12 }"),
+    ("login_twice", "func login() { presentLoginSheet(); presentLoginSheet() }"),
+    ("card", "final class BootstrapCard { func render() {} }"),
+]
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    # The corpus is tiny, so don't skip common terms
+    monkeypatch.setattr(lexical_index, "LEXICAL_MAX_DF_FRACTION", 1.0)
+    path = str(tmp_path / "lexical.idx")
+    assert build_lexical_index(DOCS, path) == len(DOCS)
+    index = LexicalIndex(path)
+    yield index
+    index.close()
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("presentHTTPLogin2Sheet") == ["presenthttplogin2sheet", "present", "http", "login", "sheet"]
+    assert tokenize("max_retry_count") == ["max_retry_count", "max", "retry", "count"]
+    assert tokenize("let x = self") == ["x"]
+
+def test_whole_identifier_match(index):
+    ids = [doc_id for doc_id, _ in index.search("presentLoginSheet", 5)]
+    assert ids[:2] == ["login_twice", "login"]
+    assert "sheet" in ids  # matched through the "sheet" subword only
+    assert "logout" not in ids
+
+def test_scores_descend_and_respect_k(index):
+    results = index.search("login sheet", 2)
+    assert len(results) == 2
+    assert results[0][1] >= results[1][1] > 0
+
+def test_unknown_terms(index):
+    assert index.search("nonexistentIdentifier", 5) == []
+    assert index.search("", 5) == []
+
+def test_handle_reopens_replaced_index(tmp_path):
+    path = str(tmp_path / "lexical.idx")
+    handle = LexicalIndexHandle(path)
+    assert handle.search("logout", 5) == []
+    build_lexical_index(DOCS[:2], path)
+    assert [doc_id for doc_id, _ in handle.search("logout", 5)] == ["logout"]
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a"], ["d", "b"]])
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+    scores = dict(fused)
+    assert scores["b"] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1) + 1 / (RRF_K + 2))
+    assert scores["d"] == pytest.approx(1 / (RRF_K + 1))
+
+def test_reciprocal_rank_fusion_empty():
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,60 @@
+import os
+
+from swift_chunker import chunk_swift_source, parse_swift_source
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "Sample.swift")
+
+def load_chunks():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return chunk_swift_source(f.read(), FIXTURE)
+
+def outline(chunks):
+    return [(c["type"], c["name"], c["start_line"], c["end_line"]) for c in chunks]
+
+def test_top_level_declarations():
+    assert outline(load_chunks()) == [
+        ("raw_code", None, 1, 1),
+        ("class", "BootstrapCard", 3, 25),
+        ("extension", "BootstrapCard", 27, 33),
+        ("protocol", "Renderable", 35, 37),
+        ("func", "makeCard", 39, 44),
+    ]
+
+def test_doc_comment_and_attributes_belong_to_declaration():
+    card = load_chunks()[1]
+    assert card["content"].startswith("/// A card shown on the home screen.\n@MainActor\nfinal class BootstrapCard")
+
+def test_nested_types_stay_in_parent():
+    card = load_chunks()[1]
+    assert "struct Style {" in card["content"]
+    assert "enum Kind { case small, large }" in card["content"]
+    assert card["content"].endswith("}")
+
+def test_braces_in_strings_and_comments_are_ignored():
+    card, extension = load_chunks()[1:3]
+    # Braces in literals, interpolations and nested block comments don't close the class early
+    assert '"not a { brace"' in card["content"]
+    assert "} also not a brace {" in card["content"]
+    assert "/* and a { in /* a nested */ block comment */" in card["content"]
+    assert card["content"].rstrip().endswith('Text("\\(title) { \\("}") }")\n    }\n}')
+    assert '#"a "quoted" } brace"#' in extension["content"]
+
+def test_multi_line_signatures():
+    chunks = load_chunks()
+    extension, make_card = chunks[2], chunks[4]
+    assert "animated: Bool) {" in extension["content"]
+    # `{` in a default value inside the parameter list is not the body
+    assert make_card["content"].startswith("func makeCard(\n    title: String = \"{\",")
+    assert make_card["content"].endswith("BootstrapCard()\n}")
+
+def test_chunks_cover_every_line():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        source = f.read()
+    chunks = load_chunks()
+    covered = {line for c in chunks for line in range(c["start_line"], c["end_line"] + 1)}
+    non_blank = {i + 1 for i, line in enumerate(source.splitlines()) if line.strip()}
+    assert non_blank <= covered
+
+def test_parse_swift_source_decodes_bytes():
+    with open(FIXTURE, "rb") as f:
+        assert outline(parse_swift_source(f.read(), FIXTURE)) == outline(load_chunks())